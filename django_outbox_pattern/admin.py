@@ -1,26 +1,144 @@
+from uuid import UUID
+
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.db.models import TextField
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Left
 from django.utils import timezone
+from django.utils.functional import cached_property
 
+from . import settings
+from .choices import StatusChoice
 from .models import Published
 from .models import Received
+from .utils import get_msg_digest
 
+PREVIEW_LENGTH = 100
+EXACT_COUNT_LIMIT = 10000
+
+
+def _parse_uuid(value):
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads the row count of unfiltered changelists from the PostgreSQL statistics (pg_class.reltuples),
+    since a COUNT(*) has to scan the whole table. Small tables and filtered changelists keep the exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == "postgresql" and not queryset.query.where:
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > EXACT_COUNT_LIMIT:
+                return row[0]
+        return super().count
+
+
+class OutboxModelAdmin(ModelAdmin):
+    """
+    Changelist that never loads the JSON columns: body and headers are deferred and only a truncated text preview of
+    them is selected. Searches are exact matches on indexed columns.
+    """
 
-@admin.register(Published)
-class PublishedAdmin(ModelAdmin):
     ordering = ["-added"]
-    list_display = ("destination", "body", "headers", "status", "expired", "added")
-    search_fields = ["destination"]
-    list_filter = ["added"]
+    list_filter = ["status", "added"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_help_text = "Exact match"
+    deferred_fields = ("body", "headers")
+
+    def get_ordering(self, request):
+        # A BRIN index on added cannot serve the sort, the primary key index can
+        return ["-pk"] if settings.DEFAULT_ADDED_BRIN_INDEX else self.ordering
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .defer(*self.deferred_fields)
+            .annotate(
+                body_preview=Left(self.get_body_text(), PREVIEW_LENGTH),
+                headers_preview=Left(Cast("headers", TextField()), PREVIEW_LENGTH),
+            )
+        )
+
+    def get_body_text(self):
+        return Cast("body", TextField())
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(self.get_search_filter(search_term)), False
+
+    def get_search_filter(self, search_term):
+        search_uuid = _parse_uuid(search_term)
+        return Q(id=search_uuid) if search_uuid else Q(pk__in=[])
+
+    @admin.display(description="body")
+    def body_preview(self, obj):
+        return obj.body_preview
+
+    @admin.display(description="headers")
+    def headers_preview(self, obj):
+        return obj.headers_preview
+
+
+@admin.register(Published)
+class PublishedAdmin(OutboxModelAdmin):
+    list_display = ("destination", "body_preview", "headers_preview", "status", "expired", "added")
+    search_fields = ["id", "destination"]
+    search_help_text = "Exact match by id or destination"
+    actions = ["requeue_failed"]
+    deferred_fields = ("body", "encoded_body", "headers")
+
+    def get_body_text(self):
+        return Coalesce("encoded_body", super().get_body_text())
+
+    def get_search_filter(self, search_term):
+        return super().get_search_filter(search_term) | Q(destination=search_term)
 
     @admin.display(description="can be published?", boolean=True, ordering="expires_at")
     def expired(self, obj):
         return obj.expires_at >= timezone.now()
 
+    @admin.action(description="Requeue selected failed messages")
+    def requeue_failed(self, request, queryset):
+        requeued = queryset.filter(status=StatusChoice.FAILED).requeue()
+        self.message_user(request, f"{requeued} message(s) scheduled to be published again.")
+
 
 @admin.register(Received)
-class ReceivedAdmin(ModelAdmin):
-    ordering = ["-added"]
-    list_display = ("destination", "body", "headers", "status", "added")
-    search_fields = ["headers"]
-    list_filter = ["added"]
+class ReceivedAdmin(OutboxModelAdmin):
+    list_display = ("destination_header", "body_preview", "headers_preview", "status", "added")
+    search_fields = ["id", "msg_id"]
+    search_help_text = "Exact match by id or msg_id"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(destination_header=KeyTextTransform("destination", "headers"))
+
+    def get_search_filter(self, search_term):
+        return (
+            super().get_search_filter(search_term) | Q(msg_id=search_term) | Q(msg_digest=get_msg_digest(search_term))
+        )
+
+    @admin.display(description="destination")
+    def destination_header(self, obj):
+        return obj.destination_header or ""
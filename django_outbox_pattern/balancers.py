@@ -0,0 +1,113 @@
+import random
+import threading
+
+from collections import Counter
+from functools import lru_cache
+from itertools import count
+from time import monotonic
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
+
+
+class NodeHealth:
+    """
+    Open connections and recent failures of each broker node, shared by all the connections of the process and kept up
+    to date by NodeHealthListener.
+    """
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connections = Counter()
+        self._failed_at = {}
+
+    def connected(self, node):
+        with self._lock:
+            self._connections[node] += 1
+            self._failed_at.pop(node, None)
+
+    def disconnected(self, node):
+        with self._lock:
+            if self._connections[node] > 0:
+                self._connections[node] -= 1
+
+    def failed(self, node):
+        with self._lock:
+            self._failed_at[node] = self.clock()
+
+    def connections(self, node):
+        return self._connections[node]
+
+    def is_healthy(self, node):
+        failed_at = self._failed_at.get(node)
+        return failed_at is None or self.clock() - failed_at >= settings.DEFAULT_STOMP_NODE_RETRY_TIME
+
+
+node_health = NodeHealth()
+
+
+class FailoverBalancer:
+    """Keeps the configured order, every connection goes to the first node and the others are only used on failure"""
+
+    def order(self, host_and_ports):
+        return list(host_and_ports)
+
+
+class RoundRobinBalancer:
+    """
+    Each new connection starts from the next node. Each process starts from a random node, otherwise the first
+    connection of every process would go to the same node.
+    """
+
+    def __init__(self):
+        self._counter = count(random.randrange(1 << 16))
+
+    def order(self, host_and_ports):
+        nodes = list(host_and_ports)
+        start = next(self._counter) % len(nodes)
+        return nodes[start:] + nodes[:start]
+
+
+class RandomBalancer:
+    """Each new connection tries the nodes in a random order"""
+
+    def order(self, host_and_ports):
+        return random.sample(list(host_and_ports), len(host_and_ports))
+
+
+class LeastConnectionsBalancer:
+    """
+    Each new connection starts from the node with the fewest connections open by this process. Ties are broken
+    randomly, so processes with the same number of connections do not all pick the same node.
+    """
+
+    def __init__(self, health=node_health):
+        self.health = health
+
+    def order(self, host_and_ports):
+        return sorted(host_and_ports, key=lambda node: (self.health.connections(node), random.random()))
+
+
+BALANCERS = {
+    "failover": FailoverBalancer,
+    "round_robin": RoundRobinBalancer,
+    "random": RandomBalancer,
+    "least_connections": LeastConnectionsBalancer,
+}
+
+
+@lru_cache(maxsize=None)
+def get_balancer(name):
+    """Balancer named in BALANCERS or given by a dotted path, a single instance per process keeps its state"""
+    balancer_class = BALANCERS.get(name) or cached_import_string(name)
+    return balancer_class()
+
+
+def order_host_and_ports(host_and_ports, health=node_health):
+    """
+    Orders the nodes with the DEFAULT_STOMP_BALANCER strategy and moves the ones that failed in the last
+    DEFAULT_STOMP_NODE_RETRY_TIME seconds to the end, so new connections fail over without waiting on them.
+    """
+    nodes = get_balancer(settings.DEFAULT_STOMP_BALANCER).order([tuple(node) for node in host_and_ports])
+    return sorted(nodes, key=lambda node: not health.is_healthy(node))
@@ -24,6 +24,11 @@ class Base:
             else:
                 self.attempts = 0
 
+    def connect_once(self):
+        """Single connection attempt without backoff, StompException is propagated to the caller"""
+        if not self.is_connected():
+            self.connection.connect(**self._credentials, wait=True)
+
     def is_connected(self):
         return self.connection.is_connected()
 
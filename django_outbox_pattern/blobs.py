@@ -0,0 +1,53 @@
+import json
+
+from uuid import uuid4
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
+
+CLAIM_CHECK_HEADER = "dop-claim-check"
+
+
+class StorageBlobStore:
+    """Keeps the bodies offloaded by the claim check in the Django storage DEFAULT_CLAIM_CHECK_STORAGE"""
+
+    def __init__(self, storage=None):
+        self.storage = storage or storages[settings.DEFAULT_CLAIM_CHECK_STORAGE]
+
+    def save(self, content):
+        """Stores the encoded body and returns the reference sent in the dop-claim-check header"""
+        name = f"{settings.DEFAULT_CLAIM_CHECK_PREFIX}{uuid4().hex}.json"
+        return self.storage.save(name, ContentFile(content.encode()))
+
+    def load(self, reference):
+        with self.storage.open(reference, "rb") as file:
+            return file.read().decode()
+
+
+def get_blob_store():
+    return cached_import_string(settings.DEFAULT_CLAIM_CHECK_STORE)()
+
+
+def check_in(published):
+    """
+    Moves the body of a new message to the blob store when its encoded size exceeds DEFAULT_CLAIM_CHECK_THRESHOLD bytes,
+    leaving only the reference in the headers. Returns whether the body was moved.
+    """
+    threshold = settings.DEFAULT_CLAIM_CHECK_THRESHOLD
+    if not threshold:
+        return False
+
+    content = published.encoded_body
+    if content is None:
+        content = json.dumps(published.body, cls=DjangoJSONEncoder)
+    if len(content.encode()) <= threshold:
+        return False
+
+    published.headers = {**(published.headers or {}), CLAIM_CHECK_HEADER: get_blob_store().save(content)}
+    published.body = None
+    published.encoded_body = None
+    return True
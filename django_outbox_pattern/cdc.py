@@ -0,0 +1,165 @@
+import json
+import logging
+
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db import models
+from django.utils import timezone
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.exceptions import DestinationUnavailableException
+from django_outbox_pattern.exceptions import ExceededSendAttemptsException
+from django_outbox_pattern.utils import cached_import_string
+
+try:
+    import psycopg2
+    import psycopg2.errors
+
+    from psycopg2.extras import LogicalReplicationConnection
+except ImportError:  # pragma: no cover
+    psycopg2 = None
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+OUTPUT_PLUGIN = "wal2json"
+
+
+def replication_slot_exists(slot_name=None):
+    """Whether the outbox database has the replication slot of publish_cdc, i.e. the outbox is published by CDC"""
+    connection = connections[settings.DEFAULT_OUTBOX_DATABASE]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_replication_slots WHERE slot_name = %s", [slot_name or settings.DEFAULT_CDC_SLOT_NAME]
+        )
+        return cursor.fetchone() is not None
+
+
+class CdcPublisher:
+    """
+    Publishes the messages of the outbox by tailing a PostgreSQL logical replication slot decoded by wal2json, instead
+    of polling the table and updating the status of each message.
+
+    Every row that is inserted, or updated back to SCHEDULE by a requeue, is sent in commit order. The position of the
+    slot is confirmed at the end of each transaction, so after a restart the messages of an unconfirmed transaction are
+    sent again. Only messages that exceed the send attempts are written to, to mark them as FAILED. Old messages are
+    purged at the end of a transaction, at most once every REMOVE_DATA_CACHE_TTL seconds as the publish command does.
+    """
+
+    def __init__(self, producer, slot_name=None):
+        self.producer = producer
+        self.slot_name = slot_name or settings.DEFAULT_CDC_SLOT_NAME
+        self.published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+        self.database = settings.DEFAULT_OUTBOX_DATABASE
+        self._fields = {field.column: field for field in self.published_class._meta.concrete_fields}
+
+    def start(self):
+        if settings.DEFAULT_PUBLISHED_SEND_ON_COMMIT:
+            raise ImproperlyConfigured(
+                "The CDC publisher cannot be used with DEFAULT_PUBLISHED_SEND_ON_COMMIT, "
+                "every message would be sent twice"
+            )
+        connection = self._connect()
+        try:
+            cursor = connection.cursor()
+            self._create_slot(cursor)
+            cursor.start_replication(slot_name=self.slot_name, decode=True, options=self._get_plugin_options())
+            self.producer.start()
+            _logger.info("Waiting for changes on the replication slot %s", self.slot_name)
+            try:
+                cursor.consume_stream(self.consume)
+            finally:
+                self.producer.stop()
+        finally:
+            connection.close()
+
+    def drop_slot(self):
+        connection = self._connect()
+        try:
+            connection.cursor().drop_replication_slot(self.slot_name)
+        finally:
+            connection.close()
+        _logger.info("Replication slot %s dropped", self.slot_name)
+
+    def consume(self, message):
+        change = json.loads(message.payload)
+        if change.get("action") == "C":
+            message.cursor.send_feedback(flush_lsn=message.data_start)
+            self.producer._remove_old_messages()
+            return
+
+        published = self._get_published(change)
+        if published is not None:
+            self._send(published)
+
+    def _get_published(self, change):
+        if change.get("action") not in ("I", "U"):
+            return None
+
+        columns = {column["name"]: column["value"] for column in change.get("columns", [])}
+        if columns.get("status") != StatusChoice.SCHEDULE:
+            return None
+
+        if change["action"] == "U":
+            # Unchanged TOASTed columns, like a large body, are not part of the decoded update
+            return self.published_class.objects.filter(pk=columns["id"], status=StatusChoice.SCHEDULE).first()
+
+        return self.published_class(
+            **{
+                self._fields[name].attname: self._to_python(name, value)
+                for name, value in columns.items()
+                if name in self._fields
+            }
+        )
+
+    def _to_python(self, column, value):
+        field = self._fields[column]
+        if isinstance(field, models.JSONField) and isinstance(value, str):
+            return json.loads(value)
+        return field.to_python(value)
+
+    def _send(self, published):
+        # Waits for the broker to come back instead of burning the send attempts of every message on a lost connection
+        self.producer.connect()
+        try:
+            self.producer.send(published)
+        except (ExceededSendAttemptsException, DestinationUnavailableException) as exc:
+            # The stream cannot leave the message for later, it is marked FAILED to be requeued
+            _logger.exception("Exceeded send attempts")
+            self.published_class.objects.filter(pk=published.pk).update(
+                status=StatusChoice.FAILED, retry=exc.attempts, expires_at=timezone.now() + timedelta(15)
+            )
+            _logger.info("Message no published with id: %s", published.pk)
+        else:
+            _logger.info("Message published with id: %s", published.pk)
+
+    def _get_plugin_options(self):
+        return {
+            "format-version": "2",
+            "include-transaction": "true",
+            "actions": "insert,update",
+            "add-tables": f"*.{self.published_class._meta.db_table}",
+        }
+
+    def _connect(self):
+        if psycopg2 is None:
+            raise ImproperlyConfigured("The CDC publisher requires psycopg2, install psycopg2 or psycopg2-binary")
+        database = connections[self.database]
+        if database.vendor != "postgresql":
+            raise ImproperlyConfigured(f"The CDC publisher requires PostgreSQL, the database {self.database} is not")
+
+        params = database.get_connection_params()
+        params.pop("cursor_factory", None)
+        return psycopg2.connect(connection_factory=LogicalReplicationConnection, **params)
+
+    def _create_slot(self, cursor):
+        try:
+            cursor.create_replication_slot(self.slot_name, output_plugin=OUTPUT_PLUGIN)
+        except psycopg2.errors.DuplicateObject:
+            _logger.debug("Replication slot %s already exists", self.slot_name)
+        else:
+            _logger.info("Replication slot %s created", self.slot_name)
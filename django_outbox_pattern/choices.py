@@ -5,3 +5,4 @@ class StatusChoice(models.IntegerChoices):
     FAILED = -1
     SCHEDULE = 1
     SUCCEEDED = 2
+    SUPERSEDED = 3
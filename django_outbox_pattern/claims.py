@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from uuid import uuid4
+
+from django.db import connections
+from django.db import transaction
+from django.utils import timezone
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
+
+
+class SkipLockedClaim:
+    """
+    Locks the messages with SELECT ... FOR UPDATE SKIP LOCKED for the duration of the transaction, so concurrent
+    publishers skip each other's messages. Used on PostgreSQL and any other database that supports it.
+
+    The claim covers every message of the queryset, so after it there is nothing more to claim until the next poll.
+    """
+
+    has_more = False
+
+    @contextmanager
+    def claim(self, queryset):
+        with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+            yield queryset.select_for_update(skip_locked=True).iterator(
+                chunk_size=settings.DEFAULT_PUBLISHED_CHUNK_SIZE
+            )
+
+    def release(self, queryset):
+        """Nothing to do, the lock of the messages ends with the transaction"""
+
+
+class SingleWriterClaim(SkipLockedClaim):
+    """
+    SQLite has no row locks and ignores SELECT ... FOR UPDATE. The claim starts with a write that takes the database
+    write lock until the transaction ends, so a single publisher claims messages at a time and the others wait.
+    """
+
+    @contextmanager
+    def claim(self, queryset):
+        with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+            connection = connections[settings.DEFAULT_OUTBOX_DATABASE]
+            published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+            table = connection.ops.quote_name(published_class._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(f"UPDATE {table} SET status = status WHERE 1 = 0")  # nosec
+            with super().claim(queryset) as messages:
+                yield messages
+
+
+class MySQLLeaseClaim:
+    """
+    Leases up to DEFAULT_PUBLISHED_CHUNK_SIZE messages with a single UPDATE ... ORDER BY ... LIMIT that sets locked_by
+    and locked_until, committed right away. Publishers never wait for each other's locks and, when a publisher dies,
+    its messages can be claimed again once the lease of DEFAULT_PUBLISHED_LEASE_TIME seconds expires.
+
+    has_more is True after leasing a full chunk, so the publisher claims the next chunk without waiting.
+    """
+
+    has_more = False
+
+    @contextmanager
+    def claim(self, queryset):
+        token = uuid4().hex
+        now = timezone.now()
+        connection = connections[settings.DEFAULT_OUTBOX_DATABASE]
+        meta = queryset.model._meta
+        quote_name = connection.ops.quote_name
+
+        def column(name):
+            return quote_name(meta.get_field(name).column)
+
+        # The filters of the queryset, e.g. status and priority lane, are kept in the UPDATE
+        compiler = queryset.query.get_compiler(using=settings.DEFAULT_OUTBOX_DATABASE)
+        where, where_params = compiler.compile(queryset.query.where)
+        sql = (
+            f"UPDATE {quote_name(meta.db_table)} SET {column('locked_by')} = %s, {column('locked_until')} = %s "
+            f"WHERE {where} AND ({column('locked_until')} IS NULL OR {column('locked_until')} < %s) "
+            f"ORDER BY {column('priority')} DESC, {column('added')} LIMIT %s"
+        )
+        params = [
+            token,
+            connection.ops.adapt_datetimefield_value(now + timedelta(seconds=settings.DEFAULT_PUBLISHED_LEASE_TIME)),
+            *where_params,
+            connection.ops.adapt_datetimefield_value(now),
+            settings.DEFAULT_PUBLISHED_CHUNK_SIZE,
+        ]
+        with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)  # nosec
+                self.has_more = cursor.rowcount >= settings.DEFAULT_PUBLISHED_CHUNK_SIZE
+
+        yield queryset.filter(locked_by=token).iterator(chunk_size=settings.DEFAULT_PUBLISHED_CHUNK_SIZE)
+
+    def release(self, queryset):
+        """Ends the lease of messages that were claimed but not sent, so the next poll can claim them again"""
+        queryset.update(locked_by=None, locked_until=None)
+
+
+def get_claim_strategy():
+    """DEFAULT_PUBLISHED_CLAIM_STRATEGY when it is set, otherwise the strategy that fits the outbox database"""
+    if settings.DEFAULT_PUBLISHED_CLAIM_STRATEGY:
+        return cached_import_string(settings.DEFAULT_PUBLISHED_CLAIM_STRATEGY)()
+
+    vendor = connections[settings.DEFAULT_OUTBOX_DATABASE].vendor
+    if vendor == "mysql":
+        return MySQLLeaseClaim()
+    if vendor == "sqlite":
+        return SingleWriterClaim()
+    return SkipLockedClaim()
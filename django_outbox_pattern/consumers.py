@@ -2,23 +2,37 @@ import json
 import logging
 import threading
 
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import partial
+from time import monotonic
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
 from uuid import uuid4
 
 from django import db
 from django.core.cache import cache
 from django.utils import timezone
-from django.utils.module_loading import import_string
 from request_id_django_log import local_threading
 from stomp.utils import get_uuid
 
 from django_outbox_pattern import settings
 from django_outbox_pattern.bases import Base
+from django_outbox_pattern.choices import StatusChoice
 from django_outbox_pattern.payloads import Payload
+from django_outbox_pattern.utils import cached_import_string
+from django_outbox_pattern.utils import delete_added_before
+from django_outbox_pattern.utils import get_msg_digest
 
 _logger = logging.getLogger("django_outbox_pattern")
 
+# Headers set by the broker on delivery, they must not be copied when a message is sent again
+_BROKER_HEADERS = {"ack", "content-length", "destination", "message-id", "redelivered", "subscription"}
+_DEAD_LETTER_HEADER_PREFIXES = ("x-death", "x-first-death-", "x-last-death-")
+_DLQ_SKIPPED_HEADER = "dop-dlq-skipped"
+
 
 def _get_msg_id(headers):
     """
@@ -33,6 +47,20 @@ def _get_msg_id(headers):
     return headers.get("cap-msg-id") or headers.get("dop-msg-id") or headers.get("message-id")
 
 
+def _get_msg_id_lookup(message_id):
+    if settings.DEFAULT_RECEIVED_COMPACT_MSG_ID:
+        return {"msg_digest": get_msg_digest(message_id)}
+    return {"msg_id": message_id}
+
+
+def _get_queue_name(destination, queue_name=None):
+    return queue_name if queue_name else destination.split("/")[-1]
+
+
+def _get_retry_queue_name(queue_name, delay):
+    return f"RETRY.{delay}.{queue_name}"
+
+
 def _get_or_create_correlation_id(headers: dict) -> str:
     if "dop-correlation-id" in headers:
         return headers["dop-correlation-id"]
@@ -42,6 +70,25 @@ def _get_or_create_correlation_id(headers: dict) -> str:
     return correlation_id
 
 
+class Subscription(NamedTuple):
+    callback: Callable[[Payload], None]
+    destination: str
+    queue_name: Optional[str] = None
+
+
+def remove_old_received(received_class):
+    """
+    Deletes the received messages older than DAYS_TO_KEEP_DATA, at most once every REMOVE_DATA_CACHE_TTL seconds.
+    SCHEDULE messages are kept, they are still waiting for the process_inbox command.
+    """
+    if cache.get(settings.OUTBOX_PATTERN_CONSUMER_CACHE_KEY):
+        return
+    days_ago = timezone.now() - timedelta(days=settings.DAYS_TO_KEEP_DATA)
+    delete_added_before(received_class.objects.exclude(status=StatusChoice.SCHEDULE), days_ago)
+
+    cache.set(settings.OUTBOX_PATTERN_CONSUMER_CACHE_KEY, True, settings.REMOVE_DATA_CACHE_TTL)
+
+
 class Consumer(Base):
     def __init__(self, connection, username, passcode):
         super().__init__(connection, username, passcode)
@@ -49,9 +96,10 @@ class Consumer(Base):
         self.destination = None
         self.queue_name = None
         self.subscribe_id = None
+        self.subscriptions = {}
         self.listener_name = f"consumer-listener-{get_uuid()}"
-        self.listener_class = import_string(settings.DEFAULT_CONSUMER_LISTENER_CLASS)
-        self.received_class = import_string(settings.DEFAULT_RECEIVED_CLASS)
+        self.listener_class = cached_import_string(settings.DEFAULT_CONSUMER_LISTENER_CLASS)
+        self.received_class = cached_import_string(settings.DEFAULT_RECEIVED_CLASS)
         self.subscribe_headers = settings.DEFAULT_STOMP_QUEUE_HEADERS
 
         # Background processing controls
@@ -91,27 +139,22 @@ class Consumer(Base):
     def message_handler(self, body, headers):
         self._processing_event.clear()
         local_threading.request_id = _get_or_create_correlation_id(headers)
-        try:
-            body = json.loads(body)
-        except json.JSONDecodeError as exc:
-            _logger.exception(exc)
-
-        payload = Payload(self.connection, body, headers)
         message_id = _get_msg_id(headers)
+        msg_id_lookup = _get_msg_id_lookup(message_id)
+        payload = Payload(self.connection, body, headers)
 
-        if self.received_class.objects.filter(msg_id=message_id).exists():
+        if self.received_class.objects.filter(**msg_id_lookup).exists():
             db.close_old_connections()
             _logger.info(f"Message with msg_id: {message_id} already exists. discarding the message")
             payload.ack()
             self._processing_event.set()
             return
 
-        received = self.received_class(body=body, headers=headers, msg_id=message_id)
-
-        payload.message = received
+        # The body is decoded and the Received created only when the callback uses them
+        payload.message_factory = partial(self._create_received, payload, msg_id_lookup)
 
         try:
-            self.callback(payload)
+            self._get_callback(headers)(payload)
             if payload.saved:
                 payload.ack()
             elif not payload.saved or not payload.nacked:
@@ -124,7 +167,7 @@ class Consumer(Base):
 
         except Exception:
             _logger.exception("An exception has been caught during callback processing flow")
-            payload.nack()
+            self._retry_or_nack(payload, payload.raw_body)
 
         finally:
             try:
@@ -135,14 +178,34 @@ class Consumer(Base):
             self._processing_event.set()
 
     def start(self, callback, destination, queue_name=None):
-        self.connect()
         self.callback = callback
         self.destination = destination
         self.queue_name = queue_name
-        self._create_dlq_queue(destination, self.subscribe_headers, queue_name)
-        self._create_queue(destination, self.subscribe_headers, queue_name)
+        subscription = Subscription(callback, destination, queue_name)
+        self.start_subscriptions([subscription])
+        self.subscribe_id = self._get_subscribe_id(subscription)
         _logger.info("Consumer started with id: %s", self.subscribe_id)
 
+    def start_subscriptions(self, subscriptions):
+        """Subscribes to every destination using the same connection, messages are routed by subscription id"""
+        self.connect()
+        for subscription in subscriptions:
+            subscribe_id = self._get_subscribe_id(subscription)
+            if subscribe_id is None:
+                subscribe_id = get_uuid()
+                self._create_dlq_queue(subscription.destination, self.subscribe_headers, subscription.queue_name)
+                self._create_retry_queues(subscription.destination, subscription.queue_name)
+            self.subscriptions[subscribe_id] = subscription
+            self._subscribe(subscription.destination, subscribe_id, self.subscribe_headers, subscription.queue_name)
+
+    def restart(self):
+        self.start_subscriptions(list(self.subscriptions.values()))
+
+    def is_subscribed(self, subscribe_id):
+        return subscribe_id in self.subscriptions or (
+            self.subscribe_id is not None and subscribe_id == self.subscribe_id
+        )
+
     def stop(self):
         self._shutting_down = True
 
@@ -166,7 +229,7 @@ class Consumer(Base):
         except Exception:
             pass
 
-        if self.subscribe_id and self.is_connected():
+        if self.subscriptions and self.is_connected():
             self._unsubscribe()
 
         if self.is_connected():
@@ -174,19 +237,63 @@ class Consumer(Base):
             self._disconnect()
 
     def _create_dlq_queue(self, destination, headers, queue_name=None):
-        if not self.subscribe_id:
+        subscribe_id = get_uuid()
+        self._subscribe(destination, subscribe_id, headers, queue_name, dlq=True)
+        self.connection.unsubscribe(subscribe_id)
+
+    def _create_retry_queues(self, destination, queue_name=None):
+        """
+        Each retry tier is a queue without consumers whose messages expire after the tier delay and are dead-lettered
+        back into the main queue through the default exchange.
+        """
+        queue_name = _get_queue_name(destination, queue_name)
+        for delay in settings.DEFAULT_CONSUMER_RETRY_DELAYS:
+            retry_queue_name = _get_retry_queue_name(queue_name, delay)
             subscribe_id = get_uuid()
-            self._subscribe(destination, subscribe_id, headers, queue_name, dlq=True)
+            headers = {
+                **self.subscribe_headers,
+                "exclusive": settings.DEFAULT_EXCLUSIVE_QUEUE,
+                "x-queue-name": retry_queue_name,
+                "x-message-ttl": int(delay * 1000),
+                "x-dead-letter-routing-key": queue_name,
+                "x-dead-letter-exchange": "",
+            }
+            self.connection.subscribe(retry_queue_name, subscribe_id, ack="client", headers=headers)
             self.connection.unsubscribe(subscribe_id)
+            _logger.info("Created retry queue %s with delay of %s seconds", retry_queue_name, delay)
+
+    def _retry_or_nack(self, payload, body):
+        delays = settings.DEFAULT_CONSUMER_RETRY_DELAYS
+        retry_count = int(payload.headers.get("dop-retry-count", 0))
+        subscription = self.subscriptions.get(payload.headers.get("subscription"))
+        if retry_count >= len(delays) or subscription is None:
+            payload.nack()
+            return
+
+        queue_name = _get_queue_name(subscription.destination, subscription.queue_name)
+        retry_queue_name = _get_retry_queue_name(queue_name, delays[retry_count])
+        headers = {key: value for key, value in payload.headers.items() if key not in _BROKER_HEADERS}
+        headers["dop-retry-count"] = retry_count + 1
+        self.connection.send(destination=f"/amq/queue/{retry_queue_name}", body=body, headers=headers)
+        payload.ack()
+        _logger.info("Message sent to %s, attempt %s of %s", retry_queue_name, retry_count + 1, len(delays))
+
+    def _get_subscribe_id(self, subscription):
+        return next(
+            (subscribe_id for subscribe_id, current in self.subscriptions.items() if current == subscription), None
+        )
+
+    def _create_received(self, payload, msg_id_lookup):
+        # An offloaded body stays in the blob store, the headers keep its reference
+        body = None if payload.claim_check else payload.body
+        return self.received_class(body=body, headers=payload.headers, **msg_id_lookup)
 
-    def _create_queue(self, destination, headers, queue_name=None):
-        if self.subscribe_id is None:
-            self.subscribe_id = get_uuid()
-        self._subscribe(destination, self.subscribe_id, headers, queue_name)
+    def _get_callback(self, headers):
+        subscription = self.subscriptions.get(headers.get("subscription"))
+        return subscription.callback if subscription else self.callback
 
     def _subscribe(self, destination, subscribe_id, headers, queue_name=None, dlq=False):
-        routing_key = destination.split("/")[-1]
-        queue_name = queue_name if queue_name else routing_key
+        queue_name = _get_queue_name(destination, queue_name)
         if dlq:
             queue_name = f"DLQ.{queue_name}"
         headers.update(
@@ -204,14 +311,225 @@ class Consumer(Base):
         _logger.info("Created queue %s with id: %s", queue_name, subscribe_id)
 
     def _unsubscribe(self):
-        self.connection.unsubscribe(self.subscribe_id)
-        _logger.info("Subscription with id %s canceled", self.subscribe_id)
+        for subscribe_id in self.subscriptions:
+            self.connection.unsubscribe(subscribe_id)
+            _logger.info("Subscription with id %s canceled", subscribe_id)
+        self.subscriptions = {}
         self.subscribe_id = None
 
     def _remove_old_messages(self):
-        if cache.get(settings.OUTBOX_PATTERN_CONSUMER_CACHE_KEY):
+        remove_old_received(self.received_class)
+
+
+class DeadLetterConsumer(Consumer):
+    """
+    Drains the DLQ of a queue with several workers, either running a callback on each message or republishing them
+    to a target destination in batches, each batch being a STOMP transaction with the sends and the acks.
+
+    Messages that do not match the header filters are moved to the tail of the DLQ, marked with the id of the run, so
+    they do not hold a prefetch slot and the consumer reaches the messages behind them. When a marked message comes
+    back, the whole DLQ was seen and it is left unacknowledged. Messages that are only inspected in dry run mode or
+    whose callback fails are not acknowledged, so they go back to the DLQ when the consumer disconnects.
+    """
+
+    def __init__(self, connection, username, passcode, workers=1, prefetch=100):
+        self.workers = workers
+        super().__init__(connection, username, passcode)
+        self.subscribe_headers = {"prefetch-count": prefetch}
+        self._should_process_msg_on_background = True
+        self.target = None
+        self.dead_letter_destination = None
+        self.run_id = get_uuid()
+        self.batch_size = 100
+        self.header_filters = {}
+        self.dry_run = False
+        self.stats = Counter()
+        self.last_message_at = monotonic()
+        self._lock = threading.Lock()
+        self._transaction = None
+        self._pending = Counter()
+
+    def _create_new_worker_executor(self):
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.listener_name)
+
+    def start_dead_letter(self, queue_name, callback=None, target=None):
+        """Without a callback, the messages are republished to the target, by default the queue itself"""
+        self.target = None if callback else target or f"/amq/queue/{queue_name}"
+        if callback:
+            self.callback = callback
+        self.dead_letter_destination = f"/amq/queue/DLQ.{queue_name}"
+        subscription = Subscription(self.callback, self.dead_letter_destination, queue_name)
+        self.start_subscriptions([subscription])
+        _logger.info("Reprocessing DLQ.%s", queue_name)
+
+    def start_subscriptions(self, subscriptions):
+        self.connect()
+        for subscription in subscriptions:
+            subscribe_id = self._get_subscribe_id(subscription) or get_uuid()
+            self.subscriptions[subscribe_id] = subscription
+            self.connection.subscribe(
+                subscription.destination, subscribe_id, ack="client-individual", headers=self.subscribe_headers
+            )
+
+    def restart(self):
+        # The broker discards the open transaction of a lost connection, its messages are redelivered
+        with self._lock:
+            self._transaction = None
+            self._pending = Counter()
+        super().restart()
+
+    def handle_incoming_message(self, body, headers):
+        self.last_message_at = monotonic()
+        super().handle_incoming_message(body, headers)
+
+    def message_handler(self, body, headers):
+        if any(headers.get(key) != value for key, value in self.header_filters.items()):
+            self._skip(body, headers)
+        elif self.dry_run:
+            self._count("matched")
+        elif self.target:
+            self._republish(body, headers)
+        else:
+            self._count("handled")
+            super().message_handler(body, headers)
+
+    def flush(self):
+        """Commits the open batch of republished messages"""
+        with self._lock:
+            if self._transaction is not None:
+                self._commit()
+
+    def stop(self):
+        self._shutting_down = True
+        self._pool_executor.shutdown(wait=True)
+        self.flush()
+        super().stop()
+
+    def _republish(self, body, headers):
+        forward_headers = {
+            key: value
+            for key, value in headers.items()
+            if key not in _BROKER_HEADERS
+            and key not in ("dop-retry-count", _DLQ_SKIPPED_HEADER)
+            and not key.startswith(_DEAD_LETTER_HEADER_PREFIXES)
+        }
+        self._send_in_batch(self.target, body, forward_headers, headers["message-id"], "republished")
+
+    def _skip(self, body, headers):
+        if headers.get(_DLQ_SKIPPED_HEADER) == self.run_id:
+            # Moved by this run already, the whole DLQ was seen
+            return
+        if self.dry_run:
+            self._count("skipped")
+            return
+        dead_letter_headers = {key: value for key, value in headers.items() if key not in _BROKER_HEADERS}
+        dead_letter_headers[_DLQ_SKIPPED_HEADER] = self.run_id
+        self._send_in_batch(self.dead_letter_destination, body, dead_letter_headers, headers["message-id"], "skipped")
+
+    def _send_in_batch(self, destination, body, headers, message_id, stat):
+        """Sends the message and acks the original one in the open transaction, committed every batch_size messages"""
+        with self._lock:
+            if self._transaction is None:
+                self._transaction = self.connection.begin()
+            self.connection.send(destination=destination, body=body, headers=headers, transaction=self._transaction)
+            self.connection.ack(message_id, transaction=self._transaction)
+            self._pending[stat] += 1
+            if self._pending.total() >= self.batch_size:
+                self._commit()
+
+    def _commit(self):
+        self.connection.commit(self._transaction)
+        self.stats.update(self._pending)
+        self._transaction = None
+        self._pending = Counter()
+
+    def _retry_or_nack(self, payload, body):
+        self._count("failed")
+        _logger.warning("Message %s left in the DLQ", payload.headers.get("message-id"))
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+class InboxConsumer(Consumer):
+    """
+    Consumer of the inbox mode: messages are only stored in Received with the SCHEDULE status and the callbacks run
+    later on the process_inbox command.
+
+    Messages are inserted in batches of DEFAULT_INBOX_BATCH_SIZE, or every DEFAULT_INBOX_FLUSH_INTERVAL seconds, and
+    the batch is acknowledged with a single cumulative ack per subscription once it is committed. Redelivered messages
+    are discarded by the unique message id.
+    """
+
+    def __init__(self, connection, username, passcode):
+        super().__init__(connection, username, passcode)
+        # A batch can only be filled when the broker delivers that many messages without waiting for their acks
+        prefetch_count = int(self.subscribe_headers.get("prefetch-count", 0))
+        self.subscribe_headers = {
+            **self.subscribe_headers,
+            "prefetch-count": str(max(prefetch_count, settings.DEFAULT_INBOX_BATCH_SIZE)),
+        }
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._timer = None
+
+    def message_handler(self, body, headers):
+        try:
+            body = json.loads(body)
+        except json.JSONDecodeError as exc:
+            _logger.exception(exc)
+
+        message_id = _get_msg_id(headers)
+        received = self.received_class(
+            body=body, headers=headers, status=StatusChoice.SCHEDULE, **_get_msg_id_lookup(message_id)
+        )
+        with self._lock:
+            self._buffer.append(received)
+            if len(self._buffer) >= settings.DEFAULT_INBOX_BATCH_SIZE:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(settings.DEFAULT_INBOX_FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def restart(self):
+        # Messages not yet acknowledged are redelivered on the new connection
+        with self._lock:
+            self._buffer = []
+        super().restart()
+
+    def stop(self):
+        self._shutting_down = True
+        self._pool_executor.shutdown(wait=True)
+        self.flush()
+        super().stop()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
             return
-        days_ago = timezone.now() - timedelta(days=settings.DAYS_TO_KEEP_DATA)
-        self.received_class.objects.filter(added__lt=days_ago).delete()
 
-        cache.set(settings.OUTBOX_PATTERN_CONSUMER_CACHE_KEY, True, settings.REMOVE_DATA_CACHE_TTL)
+        # Acks and nacks of the client mode are cumulative, one frame for the last message of each subscription
+        last_message_ids = {
+            received.headers.get("subscription"): received.headers["message-id"] for received in self._buffer
+        }
+        try:
+            self.received_class.objects.bulk_create(self._buffer, ignore_conflicts=True)
+        except Exception:
+            _logger.exception("Could not store %s message(s) in the inbox, they will be redelivered", len(self._buffer))
+            for message_id in last_message_ids.values():
+                self.connection.nack(message_id, requeue=True)
+        else:
+            for message_id in last_message_ids.values():
+                self.connection.ack(message_id)
+            _logger.info("%s message(s) stored in the inbox", len(self._buffer))
+        finally:
+            self._buffer = []
+            db.close_old_connections()
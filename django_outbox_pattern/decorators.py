@@ -1,13 +1,23 @@
+import copy
 import json
+import threading
 
+from contextlib import ExitStack
+from contextlib import contextmanager
+from datetime import timedelta
 from typing import List
 from typing import NamedTuple
 from typing import Optional
 
 from django.core.serializers import serialize
+from django.db import router
 from django.db import transaction
+from django.utils import timezone
 
-from django_outbox_pattern.models import Published
+from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
+
+_coalesced = threading.local()
 
 
 class Config(NamedTuple):
@@ -15,26 +25,160 @@ class Config(NamedTuple):
     fields: Optional[List[str]] = None
     serializer: Optional[str] = None
     version: Optional[str] = None
+    compact: bool = False
+    only_changed: bool = False
+    priority: int = 0
+    delay: Optional[timedelta] = None
 
 
 def publish(configs: List[Config]):
-    def save(self, *args, **kwargs):
-        with transaction.atomic():
-            super(self.__class__, self).save(*args, **kwargs)
-            for config in configs:
-                _create_published(self, *config)
-
     def decorator_publish(cls):
+        tracked = [(config, _get_tracked_fields(cls, config) if config.only_changed else None) for config in configs]
+        snapshot_fields = {field for _, fields in tracked if fields for field in fields}
+
+        def save(self, *args, **kwargs):
+            using = kwargs.get("using") or router.db_for_write(self.__class__, instance=self)
+            changed = [
+                fields is None or _has_changed(self, fields, kwargs.get("update_fields")) for _, fields in tracked
+            ]
+            with _atomic(using):
+                super(self.__class__, self).save(*args, **kwargs)
+                for (config, _), config_changed in zip(tracked, changed):
+                    if config_changed:
+                        _create_published(self, config)
+            if snapshot_fields:
+                _take_snapshot(self, snapshot_fields, kwargs.get("update_fields"))
+
         cls.save = save
+        if snapshot_fields:
+            parent_from_db = cls.from_db.__func__
+
+            def from_db(klass, db, field_names, values):
+                instance = parent_from_db(klass, db, field_names, values)
+                _take_snapshot(instance, snapshot_fields)
+                return instance
+
+            cls.from_db = classmethod(from_db)
         return cls
 
     return decorator_publish
 
 
-def _create_published(obj, destination, fields, serializer, version):
-    body = _get_body(obj, fields, serializer)
-    published = Published(body=body, destination=destination, version=version)
-    published.save()
+def _get_tracked_fields(cls, config):
+    return [field for field in cls._meta.concrete_fields if config.fields is None or field.name in config.fields]
+
+
+def _take_snapshot(instance, fields, update_fields=None):
+    """
+    Copies the loaded values of the fields, only the ones in update_fields when given. Deferred fields are left out,
+    they count as changed once loaded.
+    """
+    snapshot = {} if update_fields is None else dict(getattr(instance, "_outbox_snapshot", None) or {})
+    for field in fields:
+        if update_fields is not None and field.name not in update_fields and field.attname not in update_fields:
+            continue
+        if field.attname in instance.__dict__:
+            snapshot[field.attname] = copy.deepcopy(instance.__dict__[field.attname])
+    instance._outbox_snapshot = snapshot
+
+
+def _has_changed(instance, fields, update_fields):
+    if update_fields is not None and not any(
+        field.name in update_fields or field.attname in update_fields for field in fields
+    ):
+        return False
+    snapshot = getattr(instance, "_outbox_snapshot", None)
+    if instance._state.adding or snapshot is None:
+        return True
+    for field in fields:
+        if field.attname not in instance.__dict__:
+            continue  # Still deferred, so it was not assigned
+        if field.attname not in snapshot or snapshot[field.attname] != instance.__dict__[field.attname]:
+            return True
+    return False
+
+
+@contextmanager
+def _atomic(using):
+    """
+    Transaction of the model database, plus one on DEFAULT_OUTBOX_DATABASE when the outbox lives elsewhere. Two
+    databases are committed one after the other, so the save and its messages are only atomic on the same database.
+    """
+    with ExitStack() as stack:
+        stack.enter_context(transaction.atomic(using=using))
+        if using != settings.DEFAULT_OUTBOX_DATABASE:
+            stack.enter_context(transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE))
+        yield
+
+
+@contextmanager
+def coalesce():
+    """
+    Keeps only the last message of each object and destination created by the publish decorator inside the block, so
+    saving the same instance several times sends its final state once. Each message is inserted with its save, so a
+    rolled back savepoint also removes its message, and the older messages that survived are deleted with a single
+    DELETE when the outermost block exits. Open it inside the transaction of the saves. Nothing is deleted when the
+    block raises.
+    """
+    if getattr(_coalesced, "messages", None) is not None:
+        yield
+        return
+
+    _coalesced.messages = {}
+    try:
+        yield
+        messages = _coalesced.messages
+    finally:
+        _coalesced.messages = None
+
+    if messages:
+        published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+        pks = [published.pk for saved in messages.values() for published in saved]
+        existing = set(
+            published_class.objects.using(settings.DEFAULT_OUTBOX_DATABASE)
+            .filter(pk__in=pks)
+            .values_list("pk", flat=True)
+        )
+        kept = []
+        superseded = []
+        for saved in messages.values():
+            survivors = [published for published in saved if published.pk in existing]
+            if survivors:
+                kept.append(survivors[-1])
+                superseded.extend(published.pk for published in survivors[:-1])
+        if superseded:
+            published_class.objects.using(settings.DEFAULT_OUTBOX_DATABASE).filter(pk__in=superseded).delete()
+        for published in kept:
+            _send_on_commit(published)
+
+
+def _create_published(obj, config):
+    body = _get_body(obj, config.fields, config.serializer)
+    published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+    published = published_class(
+        body=body,
+        destination=config.destination,
+        version=config.version,
+        compaction_key=str(obj.pk) if config.compact else None,
+        priority=config.priority,
+        publish_at=timezone.now() + (config.delay or timedelta()),
+    )
+    published.save(using=settings.DEFAULT_OUTBOX_DATABASE)
+
+    messages = getattr(_coalesced, "messages", None)
+    if messages is not None:
+        messages.setdefault((obj._meta.label, obj.pk, config.destination, config.version), []).append(published)
+        return
+
+    _send_on_commit(published)
+
+
+def _send_on_commit(published):
+    if settings.DEFAULT_PUBLISHED_SEND_ON_COMMIT:
+        # Imported here so decorating models does not load the broker client stack
+        from django_outbox_pattern.dispatchers import send_on_commit
+
+        send_on_commit(published)
 
 
 def _get_body(obj, fields, serializer):
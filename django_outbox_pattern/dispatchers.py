@@ -0,0 +1,53 @@
+import logging
+
+from functools import partial
+
+from django.db import DatabaseError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from stomp.exception import StompException
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.exceptions import ProducerPoolExhaustedException
+from django_outbox_pattern.pools import producer_pool
+from django_outbox_pattern.utils import cached_import_string
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+def send_on_commit(published):
+    """
+    Schedules an immediate send of the published message once the current transaction commits.
+
+    The message is only marked as SUCCEEDED when the broker accepts it, otherwise it stays SCHEDULE and the
+    publish command delivers it on its next poll, so the outbox guarantee is preserved.
+    """
+    transaction.on_commit(partial(send_now, published), using=settings.DEFAULT_OUTBOX_DATABASE)
+
+
+def send_now(published):
+    published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+    now = timezone.now()
+    try:
+        with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+            # The MySQL lease claims rows without a row lock, so a leased row must be skipped explicitly
+            claimed = (
+                published_class.objects.select_for_update(skip_locked=True)
+                .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+                .filter(pk=published.pk, status=StatusChoice.SCHEDULE, publish_at__lte=now)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if claimed is None:
+                _logger.debug("Message %s not due yet or already claimed or leased by the publisher", published.pk)
+                return
+            with producer_pool.acquire(timeout=0) as producer:
+                producer.send_once(published)
+            published_class.objects.filter(pk=published.pk).update(status=StatusChoice.SUCCEEDED)
+    # stomp re-raises the socket errors of sendall, such as BrokenPipeError, as they are
+    except (StompException, OSError, DatabaseError, ProducerPoolExhaustedException):
+        _logger.warning("Message %s could not be sent on commit, left for the publisher", published.pk, exc_info=True)
+        return
+    _logger.info("Message published on commit with id: %s", published.pk)
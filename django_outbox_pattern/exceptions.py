@@ -4,3 +4,20 @@ class ExceededSendAttemptsException(Exception):
     def __init__(self, attempts):
         self.attempts = attempts
         super().__init__(f"Exceeded send attempts: {attempts}")
+
+
+class ProducerPoolExhaustedException(Exception):
+    """Raised when no producer becomes available in the pool within the acquire timeout"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        super().__init__(f"Producer pool exhausted: {max_size}")
+
+
+class DestinationUnavailableException(Exception):
+    """Raised when the circuit breaker of the destination opens while sending a message"""
+
+    def __init__(self, destination, attempts):
+        self.destination = destination
+        self.attempts = attempts
+        super().__init__(f"Destination unavailable: {destination}")
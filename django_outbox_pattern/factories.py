@@ -1,23 +1,28 @@
-from django.utils.module_loading import import_string
-
 from django_outbox_pattern import settings
+from django_outbox_pattern.balancers import order_host_and_ports
 from django_outbox_pattern.consumers import Consumer
+from django_outbox_pattern.consumers import DeadLetterConsumer
+from django_outbox_pattern.consumers import InboxConsumer
+from django_outbox_pattern.listeners import NodeHealthListener
 from django_outbox_pattern.producers import Producer
+from django_outbox_pattern.utils import cached_import_string
 
 USERNAME = settings.DEFAULT_STOMP_USERNAME
 PASSCODE = settings.DEFAULT_STOMP_PASSCODE
+NODE_HEALTH_LISTENER_NAME = "node-health-listener"
 
 
 def factory_connection(use_heartbeats: bool = True):
-    host_and_ports = settings.DEFAULT_STOMP_HOST_AND_PORTS
+    host_and_ports = order_host_and_ports(settings.DEFAULT_STOMP_HOST_AND_PORTS)
     heartbeats = settings.DEFAULT_STOMP_HEARTBEATS
     vhost = settings.DEFAULT_STOMP_VHOST
 
-    connection_class = import_string(settings.DEFAULT_CONNECTION_CLASS)
+    connection_class = cached_import_string(settings.DEFAULT_CONNECTION_CLASS)
     connection_parameters = {"host_and_ports": host_and_ports, "vhost": vhost}
     if use_heartbeats:
         connection_parameters["heartbeats"] = heartbeats
     connection = connection_class(**connection_parameters)
+    connection.set_listener(NODE_HEALTH_LISTENER_NAME, NodeHealthListener(host_and_ports))
 
     use_ssl = settings.DEFAULT_STOMP_USE_SSL
     if use_ssl:
@@ -47,8 +52,22 @@ def factory_consumer():
     return Consumer(connection, username, passcode)
 
 
-def factory_producer():
+def factory_inbox_consumer():
+    username = USERNAME
+    passcode = PASSCODE
+    connection = factory_connection()
+    return InboxConsumer(connection, username, passcode)
+
+
+def factory_dead_letter_consumer(workers: int = 1, prefetch: int = 100):
+    username = USERNAME
+    passcode = PASSCODE
+    connection = factory_connection()
+    return DeadLetterConsumer(connection, username, passcode, workers=workers, prefetch=prefetch)
+
+
+def factory_producer(use_heartbeats: bool = False):
     username = USERNAME
     passcode = PASSCODE
-    connection = factory_connection(use_heartbeats=False)
+    connection = factory_connection(use_heartbeats=use_heartbeats)
     return Producer(connection, username, passcode)
@@ -4,11 +4,11 @@ from uuid import uuid4
 
 from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
-from django.utils.module_loading import import_string
 from request_id_django_log.request_id import current_request_id
 from request_id_django_log.settings import NO_REQUEST_ID
 
 from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
 
 
 def generate_headers(message):
@@ -26,7 +26,7 @@ def generate_headers(message):
 
 
 def get_message_headers(published):
-    default_headers = import_string(settings.DEFAULT_GENERATE_HEADERS)(published)
+    default_headers = cached_import_string(settings.DEFAULT_GENERATE_HEADERS)(published)
     return json.loads(
         json.dumps(
             default_headers if not published.headers else published.headers | default_headers, cls=DjangoJSONEncoder
@@ -1,7 +1,10 @@
 import logging
+import threading
 
 from stomp.listener import ConnectionListener
 
+from django_outbox_pattern.balancers import node_health
+
 _logger = logging.getLogger("django_outbox_pattern")
 
 
@@ -25,10 +28,10 @@ class ConsumerListener(BaseListener):
             _logger.debug("Consumer disconnected during graceful shutdown, skipping reconnect")
             return
         _logger.debug("Consumer disconnected")
-        self.instance.start(self.instance.callback, self.instance.destination, self.instance.queue_name)
+        self.instance.restart()
 
     def on_message(self, frame):
-        if self.instance.subscribe_id in frame.headers["subscription"]:
+        if self.instance.is_subscribed(frame.headers.get("subscription")):
             _logger.info("Message id received: %s", frame.headers["message-id"])
             _logger.debug("Message body received: %s", frame.body)
             _logger.debug("Message headers received: %s", frame.headers)
@@ -44,3 +47,83 @@ class ProducerListener(BaseListener):
         if frame.cmd == "SEND":
             _logger.debug("Message body sent: %s", frame.body)
             _logger.debug("Message headers sent: %s", frame.headers)
+
+
+class ReceiptListener(ConnectionListener):
+    """
+    Waits for the answer to a frame sent with a receipt header. STOMP sends are asynchronous, a refused send is only
+    reported by an ERROR frame and the loss of the connection, so this is what ties the failure to its frame.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._receipt_id = None
+        self._error = None
+        self._answered = False
+
+    def expect(self, receipt_id):
+        with self._condition:
+            self._receipt_id = receipt_id
+            self._error = None
+            self._answered = False
+
+    def wait(self, timeout):
+        """Returns None when the receipt arrived, otherwise the reason of the failure"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._answered, timeout):
+                self._error = f"No receipt after {timeout} seconds"
+            self._receipt_id = None
+            return self._error
+
+    def on_receipt(self, frame):
+        if frame.headers.get("receipt-id") == self._receipt_id:
+            self._answer(None)
+
+    def on_error(self, frame):
+        receipt_id = frame.headers.get("receipt-id")
+        if receipt_id is None or receipt_id == self._receipt_id:
+            self._answer(frame.headers.get("message") or frame.body or "ERROR frame")
+
+    def on_disconnected(self):
+        self._answer("Disconnected")
+
+    def _answer(self, error):
+        with self._condition:
+            if self._receipt_id is None or self._answered:
+                return
+            self._error = error
+            self._answered = True
+            self._condition.notify_all()
+
+
+class NodeHealthListener(ConnectionListener):
+    """
+    Keeps node_health up to date for the balancers. The connection tries its nodes in order, so the nodes before the one
+    it connects to refused the connection.
+    """
+
+    def __init__(self, host_and_ports, health=node_health):
+        self.host_and_ports = [tuple(node) for node in host_and_ports]
+        self.health = health
+        self.node = None
+        self.connected = False
+
+    def on_connecting(self, host_and_port):
+        self.node = tuple(host_and_port)
+        if self.node in self.host_and_ports:
+            for node in self.host_and_ports[: self.host_and_ports.index(self.node)]:
+                _logger.debug("Broker node %s port %s marked as failed", *node)
+                self.health.failed(node)
+
+    def on_connected(self, frame):
+        self.connected = True
+        self.health.connected(self.node)
+
+    def on_heartbeat_timeout(self):
+        if self.node is not None:
+            self.health.failed(self.node)
+
+    def on_disconnected(self):
+        if self.connected:
+            self.health.disconnected(self.node)
+        self.connected = False
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.utils import cached_import_string
+
+INDEX_TYPES = ("brin", "btree")
+
+
+def _added_indexes(connection, table, index_type):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        name
+        for name, constraint in constraints.items()
+        if constraint["index"] and constraint["columns"] == ["added"] and constraint["type"] == index_type
+    ]
+
+
+def _is_valid(connection, name):
+    """Whether the index is usable, an interrupted concurrent build leaves an INVALID index behind. None when missing"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", [f'"{name}"'])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Switches the index on the added column of the published and received tables between btree and BRIN. "
+        "PostgreSQL only, the indexes are built and dropped concurrently"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("index_type", choices=INDEX_TYPES, help="Index type to use on the added column")
+
+    def handle(self, *args, **options):
+        index_type = options["index_type"]
+        connection = connections[settings.DEFAULT_OUTBOX_DATABASE]
+        if connection.vendor != "postgresql":
+            raise CommandError(f"The index type of added can only be changed on PostgreSQL, not {connection.vendor}")
+        for model in (
+            cached_import_string(settings.DEFAULT_PUBLISHED_CLASS),
+            cached_import_string(settings.DEFAULT_RECEIVED_CLASS),
+        ):
+            self._use_index(connection, model, index_type)
+
+    def _use_index(self, connection, model, index_type):
+        """Creates the new index before dropping the old ones, so the purge always has an index on added"""
+        table = model._meta.db_table
+        index_name = f"{table}_added_{index_type}"
+        old_type = "btree" if index_type == "brin" else "brin"
+        old_indexes = _added_indexes(connection, table, old_type)
+        valid = _is_valid(connection, index_name)
+        if not old_indexes and _added_indexes(connection, table, index_type) and valid is not False:
+            self.stdout.write(f"{table} already uses a {index_type} index on added")
+            return
+
+        with connection.cursor() as cursor:
+            if valid is False:
+                # IF NOT EXISTS would keep the index of a failed build, which the planner never uses
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" ON "{table}" USING {index_type} ("added")'
+            )
+            if not _is_valid(connection, index_name):
+                raise CommandError(f"The {index_type} index on {table}.added is not valid, the old index is kept")
+            for name in old_indexes:
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+        self.stdout.write(f"{table} now uses a {index_type} index on added")
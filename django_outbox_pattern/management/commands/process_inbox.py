@@ -0,0 +1,112 @@
+import logging
+import signal
+import threading
+
+from django import db
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.consumers import remove_old_received
+from django_outbox_pattern.payloads import InboxPayload
+from django_outbox_pattern.utils import cached_import_string
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+class Command(BaseCommand):
+    help = "Runs the callback on the messages stored in the inbox by the subscribe command with --inbox"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = True
+        self._stop_event = threading.Event()
+
+    def add_arguments(self, parser):
+        parser.add_argument("callback", help="A dotted module path with the function to process messages")
+        parser.add_argument("--destination", help="Only process messages received from this destination")
+        parser.add_argument("--workers", type=int, default=1, help="Number of threads processing messages")
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages claimed per transaction")
+        parser.add_argument(
+            "--waiting-time", type=float, default=1, help="Seconds to wait when there are no messages to process"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            callback = import_string(options["callback"])
+        except ImportError as exc:
+            raise CommandError(f"Could not import '{options['callback']}'. {exc.__class__}: {exc}.") from exc
+
+        self._register_signal_handlers()
+        workers = [
+            threading.Thread(target=self._work, args=(callback, options), name=f"inbox-worker-{number}")
+            for number in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+        _logger.info("Processing the inbox with %s worker(s)", len(workers))
+        for worker in workers:
+            worker.join()
+        _logger.info("Inbox processing stopped")
+
+    def _register_signal_handlers(self):
+        def _shutdown_handler(signum, frame):
+            _logger.info("Received %s, stopping after the current batch...", signal.Signals(signum).name)
+            self.running = False
+            self._stop_event.set()
+
+        signal.signal(signal.SIGTERM, _shutdown_handler)
+        signal.signal(signal.SIGINT, _shutdown_handler)
+
+    def _work(self, callback, options):
+        try:
+            while self.running:
+                try:
+                    processed = self._process_batch(callback, options["batch_size"], options["destination"])
+                except DatabaseError:
+                    _logger.exception("Could not claim messages from the inbox")
+                    db.close_old_connections()
+                    processed = 0
+                if not processed:
+                    remove_old_received(cached_import_string(settings.DEFAULT_RECEIVED_CLASS))
+                    self._stop_event.wait(options["waiting_time"])
+        finally:
+            db.connections.close_all()
+
+    def _process_batch(self, callback, batch_size, destination=None):
+        """
+        Claims a batch of messages with SKIP LOCKED, so each worker gets different rows, and runs the callback of each
+        message in a savepoint. A message whose callback raises is marked as FAILED and the rest of the batch goes on.
+        """
+        received_class = cached_import_string(settings.DEFAULT_RECEIVED_CLASS)
+        queryset = received_class.objects.filter(status=StatusChoice.SCHEDULE)
+        if destination:
+            queryset = queryset.filter(headers__destination=destination)
+
+        with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+            messages = list(queryset.select_for_update(skip_locked=True).order_by("added")[:batch_size])
+            for message in messages:
+                self._process_message(callback, message)
+        return len(messages)
+
+    def _process_message(self, callback, message):
+        payload = InboxPayload(message)
+        try:
+            with transaction.atomic(using=settings.DEFAULT_OUTBOX_DATABASE):
+                callback(payload)
+        except Exception:
+            _logger.exception("An exception has been caught during callback processing flow")
+            type(message).objects.filter(pk=message.pk).update(status=StatusChoice.FAILED, retry=F("retry") + 1)
+            return
+
+        if not payload.saved and not payload.nacked:
+            _logger.warning(
+                "The save or nack command was not executed, the message is marked as failed. message-id: %s",
+                message.msg_id,
+            )
+            type(message).objects.filter(pk=message.pk).update(status=StatusChoice.FAILED)
@@ -2,6 +2,7 @@ import logging
 import sys
 
 from django.core.management.base import BaseCommand
+from django.utils.functional import cached_property
 
 from django_outbox_pattern.factories import factory_producer
 
@@ -11,9 +12,18 @@ _logger = logging.getLogger("django_outbox_pattern")
 class Command(BaseCommand):
     help = "Publish command"
     running = True
-    producer = factory_producer()
+
+    @cached_property
+    def producer(self):
+        return factory_producer()
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-priority", type=int, help="Only publish messages with at least this priority")
+        parser.add_argument("--max-priority", type=int, help="Only publish messages with at most this priority")
 
     def handle(self, *args, **options):
+        self.producer.min_priority = options.get("min_priority")
+        self.producer.max_priority = options.get("max_priority")
         try:
             self._publish()
         except KeyboardInterrupt:
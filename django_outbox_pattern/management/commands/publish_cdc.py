@@ -0,0 +1,31 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from django_outbox_pattern.cdc import CdcPublisher
+from django_outbox_pattern.factories import factory_producer
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+class Command(BaseCommand):
+    help = "Publishes the outbox from a PostgreSQL logical replication slot instead of polling the table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slot-name", help="Replication slot to read from. Default: DEFAULT_CDC_SLOT_NAME")
+        parser.add_argument(
+            "--drop-slot",
+            action="store_true",
+            help="Drop the replication slot and exit, so the database stops retaining WAL for it",
+        )
+
+    def handle(self, *args, **options):
+        publisher = CdcPublisher(factory_producer(), slot_name=options["slot_name"])
+        if options["drop_slot"]:
+            publisher.drop_slot()
+            return
+
+        try:
+            publisher.start()
+        except KeyboardInterrupt:
+            _logger.info("I'm not waiting for messages anymore 🥲!")
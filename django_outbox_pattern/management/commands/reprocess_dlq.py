@@ -0,0 +1,99 @@
+import logging
+
+from time import monotonic
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils.module_loading import import_string
+
+from django_outbox_pattern.factories import factory_dead_letter_consumer
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+def _header(value):
+    key, separator, header_value = value.partition("=")
+    if not separator:
+        raise CommandError(f"Invalid header filter: {value}. Use key=value")
+    return key, header_value
+
+
+class Command(BaseCommand):
+    help = "Drains the DLQ of a queue, republishing its messages or running a callback on them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue_name", help="Name of the queue whose DLQ.<queue_name> is reprocessed")
+        parser.add_argument(
+            "--callback",
+            help="A dotted module path with the function to process messages. "
+            "When omitted, the messages are republished to --target",
+        )
+        parser.add_argument(
+            "--target", help="Destination of the republished messages. Default: /amq/queue/<queue_name>"
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Number of threads processing messages")
+        parser.add_argument("--prefetch", type=int, default=500, help="Maximum unacknowledged messages in flight")
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages republished per transaction")
+        parser.add_argument(
+            "--header",
+            type=_header,
+            action="append",
+            default=[],
+            help="Only reprocess messages with this header, as key=value. Can be repeated",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the matching messages, at most --prefetch of them"
+        )
+        parser.add_argument(
+            "--idle-timeout", type=float, default=10, help="Stop after this many seconds without new messages"
+        )
+        parser.add_argument("--progress-interval", type=float, default=10, help="Seconds between progress reports")
+
+    def handle(self, *args, **options):
+        callback = None
+        if options["callback"]:
+            try:
+                callback = import_string(options["callback"])
+            except ImportError as exc:
+                raise CommandError(f"Could not import '{options['callback']}'. {exc.__class__}: {exc}.") from exc
+
+        consumer = factory_dead_letter_consumer(workers=options["workers"], prefetch=options["prefetch"])
+        consumer.batch_size = options["batch_size"]
+        consumer.header_filters = dict(options["header"])
+        consumer.dry_run = options["dry_run"]
+
+        started_at = monotonic()
+        try:
+            consumer.start_dead_letter(options["queue_name"], callback=callback, target=options["target"])
+            self._wait(consumer, options["idle_timeout"], options["progress_interval"], started_at)
+        except KeyboardInterrupt:
+            _logger.info("Received KeyboardInterrupt, stopping")
+        finally:
+            consumer.stop()
+
+        self.stdout.write(self._progress(consumer, started_at))
+
+    def _wait(self, consumer, idle_timeout, progress_interval, started_at):
+        reported_at = started_at
+        while consumer.is_connected():
+            sleep(1)
+            consumer.flush()
+            now = monotonic()
+            if now - consumer.last_message_at >= idle_timeout:
+                _logger.info("No messages for %s seconds, stopping", idle_timeout)
+                return
+            if now - reported_at >= progress_interval:
+                _logger.info(self._progress(consumer, started_at))
+                reported_at = now
+
+    @staticmethod
+    def _progress(consumer, started_at):
+        stats = consumer.stats
+        elapsed = max(monotonic() - started_at, 0.001)
+        done = stats["republished"] + stats["handled"] + stats["matched"]
+        return (
+            f"{stats['republished']} republished, {stats['handled'] - stats['failed']} processed, "
+            f"{stats['failed']} failed, {stats['matched']} matched, {stats['skipped']} skipped "
+            f"({done / elapsed:.1f} messages/s)"
+        )
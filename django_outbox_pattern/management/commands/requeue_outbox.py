@@ -0,0 +1,99 @@
+import logging
+
+from time import monotonic
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.cdc import replication_slot_exists
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.utils import cached_import_string
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+def _datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f"Invalid datetime: {value}. Use the ISO 8601 format, e.g. 2024-01-31T12:00:00")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Moves FAILED published messages back to SCHEDULE so that the publish command sends them again"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--destination", help="Only requeue messages sent to this destination")
+        parser.add_argument("--since", type=_datetime, help="Only requeue messages added at or after this datetime")
+        parser.add_argument("--until", type=_datetime, help="Only requeue messages added before this datetime")
+        parser.add_argument("--min-retry", type=int, help="Only requeue messages with at least this number of retries")
+        parser.add_argument("--max-retry", type=int, help="Only requeue messages with at most this number of retries")
+        parser.add_argument(
+            "--include-expired",
+            action="store_true",
+            help="Also requeue SCHEDULE messages whose expires_at has passed and are no longer published",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of rows updated per statement")
+        parser.add_argument("--rate", type=float, default=0, help="Maximum rows requeued per second, 0 for no limit")
+        parser.add_argument("--dry-run", action="store_true", help="Only show how many messages would be requeued")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be greater than zero")
+        if options["include_expired"] and replication_slot_exists():
+            # publish_cdc leaves the messages it sent as SCHEDULE, they would all be sent again
+            raise CommandError("--include-expired cannot be used when the outbox is published by publish_cdc")
+
+        queryset = self._get_queryset(options)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{queryset.count()} message(s) would be requeued")
+            return
+
+        requeued = self._requeue(queryset, options["batch_size"], options["rate"])
+        self.stdout.write(f"{requeued} message(s) requeued")
+
+    def _get_queryset(self, options):
+        published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+        statuses = Q(status=StatusChoice.FAILED)
+        if options["include_expired"]:
+            statuses |= Q(status=StatusChoice.SCHEDULE, expires_at__lt=timezone.now())
+
+        queryset = published_class.objects.filter(statuses)
+        filters = {
+            "destination": options["destination"],
+            "added__gte": options["since"],
+            "added__lt": options["until"],
+            "retry__gte": options["min_retry"],
+            "retry__lte": options["max_retry"],
+        }
+        return queryset.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+
+    def _requeue(self, queryset, batch_size, rate):
+        """
+        Walks the matching rows in primary key order, one batch per UPDATE, so each statement only locks the rows of
+        its batch. The filters are applied again in the UPDATE, rows changed in the meantime are left untouched.
+        """
+        requeued = 0
+        last_pk = None
+        started_at = monotonic()
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(batch.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+
+            requeued += queryset.filter(pk__in=pks).requeue()
+            last_pk = pks[-1]
+            _logger.info("%s message(s) requeued so far", requeued)
+
+            if rate:
+                wait = requeued / rate - (monotonic() - started_at)
+                if wait > 0:
+                    sleep(wait)
+        return requeued
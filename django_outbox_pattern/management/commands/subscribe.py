@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import signal
@@ -7,7 +8,10 @@ from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 from django.utils.module_loading import import_string
 
+from django_outbox_pattern import settings
+from django_outbox_pattern.consumers import Subscription
 from django_outbox_pattern.factories import factory_consumer
+from django_outbox_pattern.factories import factory_inbox_consumer
 
 _logger = logging.getLogger("django_outbox_pattern")
 
@@ -20,6 +24,20 @@ def _import_from_string(value):
         raise CommandError(msg) from exc
 
 
+def _load_subscriptions(config):
+    """
+    Builds the subscriptions from a mapping of destination to callback, where the value is either the dotted path of
+    the callback or a dict with the keys callback and queue_name.
+    """
+    subscriptions = []
+    for destination, value in config.items():
+        if isinstance(value, str):
+            value = {"callback": value}
+        callback = _import_from_string(value["callback"])
+        subscriptions.append(Subscription(callback, destination, value.get("queue_name")))
+    return subscriptions
+
+
 class Command(BaseCommand):
     help = "Subscribe command"
 
@@ -30,20 +48,32 @@ class Command(BaseCommand):
         self._shutdown_initiated = False
 
     def add_arguments(self, parser):
-        parser.add_argument("callback", help="A dotted module path with the function to process messages")
-        parser.add_argument("destination", help="Source destination used to consume messages")
+        parser.add_argument(
+            "callback",
+            nargs="?",
+            help="A dotted module path with the function to process messages. "
+            "When omitted, the subscriptions come from --config or DEFAULT_CONSUMER_SUBSCRIPTIONS",
+        )
+        parser.add_argument("destination", nargs="?", help="Source destination used to consume messages")
         parser.add_argument("queue_name", nargs="?", help="Optional queue name for subscribe")
+        parser.add_argument(
+            "--config",
+            help="Path to a JSON file mapping destinations to callbacks, all consumed over a single connection",
+        )
+        parser.add_argument(
+            "--inbox",
+            action="store_true",
+            help="Only store the messages in the inbox, the callbacks are run by the process_inbox command",
+        )
 
     def handle(self, *args, **options):
-        callback = _import_from_string(options.get("callback"))
-        destination = options.get("destination")
-        queue_name = options.get("queue_name")
-        consumer = factory_consumer()
+        subscriptions = self._get_subscriptions(options)
+        consumer = factory_inbox_consumer() if options.get("inbox") else factory_consumer()
 
         self._register_signal_handlers()
 
         try:
-            self._start(consumer, callback, destination, queue_name)
+            self._start(consumer, subscriptions)
         except KeyboardInterrupt:
             _logger.info("Received KeyboardInterrupt, initiating graceful shutdown...")
             self.running = False
@@ -53,6 +83,28 @@ class Command(BaseCommand):
         consumer.stop()
         _logger.info("Consumer stopped")
 
+    def _get_subscriptions(self, options):
+        callback = options.get("callback")
+        if callback:
+            if not options.get("destination"):
+                raise CommandError("Error: the following arguments are required: destination")
+            return [Subscription(_import_from_string(callback), options["destination"], options.get("queue_name"))]
+
+        if options.get("config"):
+            try:
+                with open(options["config"], encoding="utf-8") as config_file:
+                    config = json.load(config_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read '{options['config']}'. {exc.__class__}: {exc}.") from exc
+        else:
+            config = settings.DEFAULT_CONSUMER_SUBSCRIPTIONS
+
+        if not config:
+            raise CommandError(
+                "Error: provide the callback and destination arguments, --config or DEFAULT_CONSUMER_SUBSCRIPTIONS"
+            )
+        return _load_subscriptions(config)
+
     def _register_signal_handlers(self):
         def _shutdown_handler(signum, frame):
             sig_name = signal.Signals(signum).name
@@ -70,8 +122,8 @@ class Command(BaseCommand):
         signal.signal(signal.SIGTERM, _shutdown_handler)
         signal.signal(signal.SIGINT, _shutdown_handler)
 
-    def _start(self, consumer, callback, destination, queue_name):
-        consumer.start(callback, destination, queue_name)
+    def _start(self, consumer, subscriptions):
+        consumer.start_subscriptions(subscriptions)
         _logger.info("Waiting for messages to be consumed...")
         while self.running and consumer.is_connected():
             self._stop_event.wait(timeout=1)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:23
+
+from django.db import migrations
+from django.db import models
+
+import django_outbox_pattern.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_outbox_pattern", "0006_published_published_status_27c9ec_btree"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="published",
+            name="id",
+            field=models.UUIDField(
+                default=django_outbox_pattern.models._generate_id,
+                editable=False,
+                help_text="Id using UUID Field generated by DEFAULT_ID_GENERATOR",
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="received",
+            name="id",
+            field=models.UUIDField(
+                default=django_outbox_pattern.models._generate_id,
+                editable=False,
+                help_text="Id using UUID Field generated by DEFAULT_ID_GENERATOR",
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:24
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_outbox_pattern", "0007_id_generator"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="received",
+            name="msg_digest",
+            field=models.UUIDField(
+                help_text="Fixed width digest of msg_id used when DEFAULT_RECEIVED_COMPACT_MSG_ID is enabled",
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="received",
+            name="msg_id",
+            field=models.CharField(max_length=100, null=True, unique=True),
+        ),
+    ]
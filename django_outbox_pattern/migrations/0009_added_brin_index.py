@@ -0,0 +1,14 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Kept for the migration graph. The index type of added is no longer chosen here but with the outbox_added_index
+    command, so the schema does not depend on the settings at migration time.
+    """
+
+    dependencies = [
+        ("django_outbox_pattern", "0008_received_msg_digest"),
+    ]
+
+    operations = []
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db import models
+
+from django_outbox_pattern.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("django_outbox_pattern", "0009_added_brin_index"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="published",
+            index=models.Index(fields=["destination"], name="published_destination_btree"),
+        ),
+        AddIndexConcurrently(
+            model_name="received",
+            index=models.Index(fields=["status"], name="received_status_btree"),
+        ),
+    ]
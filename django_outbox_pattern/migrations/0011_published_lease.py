@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_outbox_pattern", "0010_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="published",
+            name="locked_by",
+            field=models.CharField(
+                editable=False, help_text="Publisher that leased the message, used on MySQL", max_length=32, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="published",
+            name="locked_until",
+            field=models.DateTimeField(editable=False, help_text="End of the lease of the message", null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:44
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_outbox_pattern", "0011_published_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="published",
+            name="encoded_body",
+            field=models.TextField(
+                help_text="Body encoded as sent to the broker, used when DEFAULT_PUBLISHED_ENCODED_BODY is enabled",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="published",
+            name="body",
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:48
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_outbox_pattern", "0012_published_encoded_body"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="published",
+            name="compaction_key",
+            field=models.CharField(
+                help_text="Messages with the same destination and key are compacted, only the newest one is sent",
+                max_length=255,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="published",
+            name="status",
+            field=models.IntegerField(
+                choices=[(-1, "Failed"), (1, "Schedule"), (2, "Succeeded"), (3, "Superseded")], default=1
+            ),
+        ),
+        migrations.AlterField(
+            model_name="received",
+            name="status",
+            field=models.IntegerField(
+                choices=[(-1, "Failed"), (1, "Schedule"), (2, "Succeeded"), (3, "Superseded")], default=2
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:52
+
+from django.db import migrations
+from django.db import models
+
+from django_outbox_pattern.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("django_outbox_pattern", "0013_published_compaction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="published",
+            name="priority",
+            field=models.SmallIntegerField(default=0, help_text="Messages with higher priority are published first"),
+        ),
+        AddIndexConcurrently(
+            model_name="published",
+            index=models.Index(fields=["status", "-priority", "added"], name="published_priority_btree"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:00
+
+import django.utils.timezone
+
+from django.db import migrations
+from django.db import models
+
+from django_outbox_pattern.operations import AddIndexConcurrently
+from django_outbox_pattern.operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("django_outbox_pattern", "0014_published_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="published",
+            name="publish_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, help_text="The message is not published before this time"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="published",
+            index=models.Index(fields=["status", "publish_at"], name="published_publish_at_btree"),
+        ),
+        RemoveIndexConcurrently(
+            model_name="published",
+            name="published_status_27c9ec_btree",
+        ),
+    ]
@@ -1,62 +1,120 @@
-import uuid
+import json
 
 from datetime import timedelta
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
+from django_outbox_pattern import settings
+from django_outbox_pattern.blobs import check_in
 from django_outbox_pattern.choices import StatusChoice
 from django_outbox_pattern.headers import get_message_headers
+from django_outbox_pattern.utils import cached_import_string
 
 
 def _one_more_day():
     return timezone.now() + timedelta(1)
 
 
+def _generate_id():
+    return cached_import_string(settings.DEFAULT_ID_GENERATOR)()
+
+
+class OutboxManager(models.Manager):
+    """Manager whose querysets run on DEFAULT_OUTBOX_DATABASE unless another database is given with using()"""
+
+    def get_queryset(self):
+        return super().get_queryset().using(self._db or settings.DEFAULT_OUTBOX_DATABASE)
+
+
+class PublishedQuerySet(models.QuerySet):
+    def requeue(self):
+        """Schedules the messages to be sent again by the publisher, in a single UPDATE"""
+        return self.update(
+            status=StatusChoice.SCHEDULE, retry=0, expires_at=_one_more_day(), locked_by=None, locked_until=None
+        )
+
+
 class Published(models.Model):
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        default=_generate_id,
         editable=False,
-        help_text="Id not sequential using UUID Field",
+        help_text="Id using UUID Field generated by DEFAULT_ID_GENERATOR",
     )
     version = models.CharField(max_length=100, null=True)
     destination = models.CharField(max_length=255)
-    body = models.JSONField()
+    body = models.JSONField(null=True)
+    encoded_body = models.TextField(
+        null=True, help_text="Body encoded as sent to the broker, used when DEFAULT_PUBLISHED_ENCODED_BODY is enabled"
+    )
     added = models.DateTimeField(auto_now_add=True, db_index=True)
     expires_at = models.DateTimeField(default=_one_more_day)
     retry = models.PositiveIntegerField(default=0)
     status = models.IntegerField(choices=StatusChoice.choices, default=StatusChoice.SCHEDULE)
     headers = models.JSONField(default=dict)
+    publish_at = models.DateTimeField(default=timezone.now, help_text="The message is not published before this time")
+    priority = models.SmallIntegerField(default=0, help_text="Messages with higher priority are published first")
+    compaction_key = models.CharField(
+        max_length=255,
+        null=True,
+        help_text="Messages with the same destination and key are compacted, only the newest one is sent",
+    )
+    locked_by = models.CharField(
+        max_length=32, null=True, editable=False, help_text="Publisher that leased the message, used on MySQL"
+    )
+    locked_until = models.DateTimeField(null=True, editable=False, help_text="End of the lease of the message")
+
+    objects = OutboxManager.from_queryset(PublishedQuerySet)()
 
     class Meta:
         verbose_name = "published"
         db_table = "published"
         indexes = [
-            models.Index(fields=["status"], name="published_status_27c9ec_btree"),
+            models.Index(fields=["destination"], name="published_destination_btree"),
+            models.Index(fields=["status", "-priority", "added"], name="published_priority_btree"),
+            models.Index(fields=["status", "publish_at"], name="published_publish_at_btree"),
         ]
 
     def __str__(self):
-        return f"{self.destination} - {self.body}"
+        return f"{self.destination} - {self.body if self.encoded_body is None else self.encoded_body}"
 
     def save(self, *args, **kwargs):
-        if self._state.adding and self.version:
-            self.destination = f"{self.destination}.{self.version}"
-        self.headers = get_message_headers(self)
-
+        self.prepare(kwargs.get("update_fields"))
         super().save(*args, **kwargs)
 
+    def prepare(self, update_fields=None):
+        """
+        Sets the versioned destination, the claim check or encoded body and the headers, also used before a bulk_create
+        """
+        if self._state.adding:
+            if self.version:
+                self.destination = f"{self.destination}.{self.version}"
+            if self.publish_at and self.expires_at < self.publish_at:
+                # A message scheduled after its expiration would never be published
+                self.expires_at = self.publish_at + timedelta(1)
+            claimed = check_in(self)
+            if not claimed and settings.DEFAULT_PUBLISHED_ENCODED_BODY and self.encoded_body is None:
+                self.encoded_body = json.dumps(self.body, cls=DjangoJSONEncoder)
+                self.body = None
+        if update_fields is None or "headers" in update_fields:
+            self.headers = get_message_headers(self)
+
 
 class Received(models.Model):
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        default=_generate_id,
         editable=False,
-        help_text="Id not sequential using UUID Field",
+        help_text="Id using UUID Field generated by DEFAULT_ID_GENERATOR",
+    )
+    msg_id = models.CharField(max_length=100, null=True, unique=True)
+    msg_digest = models.UUIDField(
+        null=True,
+        unique=True,
+        help_text="Fixed width digest of msg_id used when DEFAULT_RECEIVED_COMPACT_MSG_ID is enabled",
     )
-    msg_id = models.CharField(max_length=100, null=True, unique=True, db_index=True)
     headers = models.JSONField(null=True)
     body = models.JSONField(null=True)
     added = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -64,6 +122,8 @@ class Received(models.Model):
     retry = models.PositiveIntegerField(default=0)
     status = models.IntegerField(choices=StatusChoice.choices, default=StatusChoice.SUCCEEDED)
 
+    objects = OutboxManager()
+
     @property
     def destination(self):
         return self.headers.get("destination", "") if self.headers else ""
@@ -71,6 +131,9 @@ class Received(models.Model):
     class Meta:
         verbose_name = "received"
         db_table = "received"
+        indexes = [
+            models.Index(fields=["status"], name="received_status_btree"),
+        ]
 
     def __str__(self):
         return f"{self.destination} - {self.body}"
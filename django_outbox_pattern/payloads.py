@@ -1,19 +1,64 @@
+import json
+import logging
+
+from functools import cached_property
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.blobs import CLAIM_CHECK_HEADER
+from django_outbox_pattern.blobs import get_blob_store
 from django_outbox_pattern.choices import StatusChoice
 
+_logger = logging.getLogger("django_outbox_pattern")
+
 
 class Payload:
-    def __init__(self, connection, body, headers, message=None):
+    """
+    Message delivered to the callback. A string or bytes body is only decoded from JSON on the first access to body,
+    it is kept as received in raw_body. Callbacks that only look at the headers, and duplicated messages, never pay for
+    the decoding. The same goes for message, the Received instance, when it is given as a message_factory, and for a
+    body offloaded by the claim check, that is fetched from the blob store.
+    """
+
+    def __init__(self, connection, body, headers, message=None, message_factory=None):
         self.nacked = None
         self.acked = None
         self.saved = False
-        self.body = body
+        self.raw_body = body
         self.connection = connection
         self.headers = headers
-        self.message = message
+        self._message = message
+        self.message_factory = message_factory
+
+    @cached_property
+    def body(self):
+        if self.claim_check:
+            return json.loads(get_blob_store().load(self.claim_check))
+        if not isinstance(self.raw_body, (str, bytes, bytearray)):
+            return self.raw_body
+        try:
+            return json.loads(self.raw_body)
+        except json.JSONDecodeError as exc:
+            _logger.exception(exc)
+            return self.raw_body
+
+    @property
+    def claim_check(self):
+        """Reference of the body offloaded to the blob store, None when the body came with the message"""
+        return (self.headers or {}).get(CLAIM_CHECK_HEADER)
+
+    @property
+    def message(self):
+        if self._message is None and self.message_factory is not None:
+            self._message = self.message_factory()
+        return self._message
+
+    @message.setter
+    def message(self, message):
+        self._message = message
 
     def save(self):
         self.message.status = StatusChoice.SUCCEEDED
-        self.message.save()
+        self.message.save(using=self.message._state.db or settings.DEFAULT_OUTBOX_DATABASE)
         self.saved = True
 
     def ack(self):
@@ -29,3 +74,25 @@ class Payload:
     @property
     def _message_id(self):
         return self.headers.get("message-id")
+
+
+class InboxPayload(Payload):
+    """
+    Payload of a message read from the Received table by the process_inbox command. The broker delivery was already
+    acknowledged when the message was stored, so ack does nothing and nack marks the message as FAILED.
+    """
+
+    def __init__(self, message):
+        super().__init__(None, message.body, message.headers, message)
+        if not self.claim_check:
+            # Already decoded by the JSON field
+            self.body = message.body
+
+    def ack(self):
+        self.acked = True
+
+    def nack(self):
+        if not self.acked and not self.nacked:
+            self.message.status = StatusChoice.FAILED
+            self.message.save(update_fields=["status"])
+            self.nacked = True
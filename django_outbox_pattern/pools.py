@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+from stomp.exception import StompException
+
+from django_outbox_pattern import factories
+from django_outbox_pattern import settings
+from django_outbox_pattern.exceptions import ExceededSendAttemptsException
+from django_outbox_pattern.exceptions import ProducerPoolExhaustedException
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+class ProducerPool:
+    """
+    Process-wide pool of connected producers that can be shared between threads.
+
+    Each producer is handed to a single thread at a time through ``acquire``. Idle producers are checked before being
+    handed out, disconnected after ``idle_timeout`` seconds without use and dropped without being disconnected when
+    the process is forked, since the child must not reuse the sockets of the parent.
+    """
+
+    def __init__(self, factory=None, max_size=None, idle_timeout=None, acquire_timeout=None):
+        self.factory = factory or (lambda: factories.factory_producer(use_heartbeats=True))
+        self.max_size = max_size or settings.DEFAULT_PRODUCER_POOL_SIZE
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.DEFAULT_PRODUCER_POOL_IDLE_TIMEOUT
+        self.acquire_timeout = (
+            acquire_timeout if acquire_timeout is not None else settings.DEFAULT_PRODUCER_POOL_ACQUIRE_TIMEOUT
+        )
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        if self._pid != os.getpid():
+            _logger.debug("Process forked, discarding producers inherited from the parent process")
+            self._reset()
+
+        slots = self._slots
+        if not slots.acquire(timeout=self.acquire_timeout if timeout is None else timeout):
+            raise ProducerPoolExhaustedException(self.max_size)
+
+        try:
+            producer = self._checkout()
+            broken = False
+            try:
+                yield producer
+            except (StompException, OSError, ExceededSendAttemptsException):
+                broken = True
+                raise
+            finally:
+                if broken or not producer.is_connected():
+                    self._discard(producer)
+                else:
+                    self._checkin(producer)
+        finally:
+            slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for producer, _ in idle:
+            self._discard(producer)
+
+    def _checkout(self):
+        with self._lock:
+            expired = self._pop_expired()
+            producer = self._idle.pop()[0] if self._idle else None
+
+        for expired_producer in expired:
+            self._discard(expired_producer)
+
+        if producer is None:
+            producer = self.factory()
+
+        if not producer.is_connected():
+            try:
+                producer.connect_once()
+            except StompException:
+                self._discard(producer)
+                raise
+
+        return producer
+
+    def _checkin(self, producer):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._idle.append((producer, time.monotonic()))
+
+    def _pop_expired(self):
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] <= deadline:
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def _discard(self, producer):
+        if producer.is_connected():
+            producer.stop()
+
+
+producer_pool = ProducerPool()
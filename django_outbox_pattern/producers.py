@@ -2,31 +2,55 @@ import json
 import logging
 
 from datetime import timedelta
+from functools import cached_property
 from time import sleep
 
 from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import DatabaseError
-from django.db import transaction
+from django.db.models import Min
 from django.utils import timezone
-from django.utils.module_loading import import_string
 from stomp.exception import StompException
 from stomp.utils import get_uuid
 
 from django_outbox_pattern import settings
 from django_outbox_pattern.bases import Base
 from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.claims import get_claim_strategy
+from django_outbox_pattern.exceptions import DestinationUnavailableException
 from django_outbox_pattern.exceptions import ExceededSendAttemptsException
+from django_outbox_pattern.listeners import ReceiptListener
+from django_outbox_pattern.throttling import DestinationThrottle
+from django_outbox_pattern.utils import batched
+from django_outbox_pattern.utils import cached_import_string
+from django_outbox_pattern.utils import delete_added_before
 
 _logger = logging.getLogger("django_outbox_pattern")
 
+# Columns read by the publisher, the others are never loaded
+PUBLISH_FIELDS = (
+    "destination",
+    "body",
+    "encoded_body",
+    "headers",
+    "status",
+    "retry",
+    "expires_at",
+    "added",
+    "compaction_key",
+)
+
 
 class Producer(Base):
     def __init__(self, connection, username, passcode):
         super().__init__(connection, username, passcode)
         self.listener_name = f"producer-listener-{get_uuid()}"
-        self.listener_class = import_string(settings.DEFAULT_PRODUCER_LISTENER_CLASS)
-        self.published_class = import_string(settings.DEFAULT_PUBLISHED_CLASS)
+        self.listener_class = cached_import_string(settings.DEFAULT_PRODUCER_LISTENER_CLASS)
+        self.published_class = cached_import_string(settings.DEFAULT_PUBLISHED_CLASS)
+        self.min_priority = None
+        self.max_priority = None
+        self.throttle = DestinationThrottle()
+        self.receipt_listener = None
 
     def __enter__(self):
         self.start()
@@ -45,13 +69,15 @@ class Producer(Base):
             _logger.error("Error disconnect listener: %s", e)
 
     def send(self, message, **kwargs):
-        kwargs = {
-            "body": json.dumps(message.body, cls=DjangoJSONEncoder),
-            "destination": message.destination,
-            "headers": message.headers,
-            **kwargs,
-        }
-        return self._send_with_retry(**kwargs)
+        return self._send_with_retry(**self._get_send_kwargs(message, **kwargs))
+
+    def send_once(self, message, **kwargs):
+        """Sends the message without retrying, StompException is propagated to the caller"""
+        self.connection.send(**self._get_send_kwargs(message, **kwargs))
+
+    def send_event_once(self, body, destination, **kwargs):
+        """Sends the event without retrying, StompException and socket errors are propagated to the caller"""
+        self.connection.send(body=json.dumps(body, cls=DjangoJSONEncoder), destination=destination, **kwargs)
 
     def send_event(self, body, destination, **kwargs):
         kwargs = {
@@ -59,75 +85,186 @@ class Producer(Base):
             "destination": destination,
             **kwargs,
         }
-        return self._send_with_retry(**kwargs)
+        attempts = self._send_with_retry(**kwargs)
+        self._remove_old_messages()
+        return attempts
+
+    def _get_send_kwargs(self, message, **kwargs):
+        encoded_body = getattr(message, "encoded_body", None)
+        return {
+            "body": json.dumps(message.body, cls=DjangoJSONEncoder) if encoded_body is None else encoded_body,
+            "destination": message.destination,
+            "headers": message.headers,
+            **kwargs,
+        }
 
     def _send_with_retry(self, **kwargs):
         """
         During the message sending process, when the broker crashes or the connection fails or an abnormality occurs,
         will retry the sending. Retry 3 times for the first time, retry every minute after 4 minutes.
         When the total number of retries reaches 50 (DEFAULT_MAXIMUM_RETRY_ATTEMPTS), will stop retrying.
+
+        The connection is opened again before each attempt. With the circuit breakers enabled, each send waits for its
+        receipt, so only the sends refused by the broker count against the circuit of their destination, and they are
+        retried without pausing until the circuit opens.
         """
 
         attempts = 0
+        destination = kwargs.get("destination")
 
         while attempts < settings.DEFAULT_MAXIMUM_RETRY_ATTEMPTS:
             try:
-                self.connection.send(**kwargs)
+                self.connect_once()
             except StompException:
                 attempts += 1
-                if attempts == 3:
-                    sleep(settings.DEFAULT_PAUSE_FOR_RETRY)
-                elif attempts > 3:
-                    sleep(settings.DEFAULT_WAIT_RETRY)
+                self._pause_for_retry(attempts)
+                continue
+
+            try:
+                self._send_and_confirm(**kwargs)
+            except StompException:
+                attempts += 1
+                if self.throttle.record_failure(destination):
+                    raise DestinationUnavailableException(destination, attempts)
+                if not self.throttle.threshold:
+                    self._pause_for_retry(attempts)
             else:
+                self.throttle.record_success(destination)
                 break
         else:
             raise ExceededSendAttemptsException(attempts)
 
-        self._remove_old_messages()
         return attempts
 
+    def _send_and_confirm(self, **kwargs):
+        if not self.throttle.threshold:
+            self.connection.send(**kwargs)
+            return
+
+        if self.receipt_listener is None:
+            self.receipt_listener = ReceiptListener()
+            self.set_listener(f"{self.listener_name}-receipt", self.receipt_listener)
+        receipt_id = get_uuid()
+        self.receipt_listener.expect(receipt_id)
+        self.connection.send(**kwargs, receipt=receipt_id)
+        error = self.receipt_listener.wait(settings.DEFAULT_PRODUCER_RECEIPT_TIMEOUT)
+        if error is not None:
+            raise StompException(f"Send to {kwargs.get('destination')} failed: {error}")
+
+    @staticmethod
+    def _pause_for_retry(attempts):
+        if attempts == 3:
+            sleep(settings.DEFAULT_PAUSE_FOR_RETRY)
+        elif attempts > 3:
+            sleep(settings.DEFAULT_WAIT_RETRY)
+
     def _remove_old_messages(self):
         if cache.get(settings.OUTBOX_PATTERN_PUBLISHER_CACHE_KEY):
             return
 
-        days_ago = timezone.now() - timedelta(days=settings.DAYS_TO_KEEP_DATA)
-        self.published_class.objects.filter(added__lt=days_ago).delete()
+        now = timezone.now()
+        days_ago = now - timedelta(days=settings.DAYS_TO_KEEP_DATA)
+        # Delayed messages are kept until they are due, however long the delay
+        delete_added_before(
+            self.published_class.objects.exclude(status=StatusChoice.SCHEDULE, publish_at__gt=now), days_ago
+        )
 
         cache.set(settings.OUTBOX_PATTERN_PUBLISHER_CACHE_KEY, True, settings.REMOVE_DATA_CACHE_TTL)
 
-    def _waiting(self):
-        sleep(settings.DEFAULT_PRODUCER_WAITING_TIME)
+    def _get_priority_lookups(self):
+        """Restricts the publisher to a lane of priorities, so each lane can have its own workers"""
+        lookups = {"priority__gte": self.min_priority, "priority__lte": self.max_priority}
+        return {lookup: value for lookup, value in lookups.items() if value is not None}
+
+    def _compact(self, messages):
+        """
+        Yields the claimed messages one chunk at a time. Within a chunk, messages with a compaction_key only yield the
+        newest one of each destination and key, the older ones are marked as SUPERSEDED with a single UPDATE.
+        """
+        for chunk in batched(messages, settings.DEFAULT_PUBLISHED_CHUNK_SIZE):
+            newest = {}
+            superseded = set()
+            for message in chunk:
+                if message.compaction_key is None or message.status != StatusChoice.SCHEDULE:
+                    continue
+                key = (message.destination, message.compaction_key)
+                current = newest.setdefault(key, message)
+                if message.added > current.added:
+                    newest[key] = message
+                    superseded.add(current.pk)
+                elif message is not current:
+                    superseded.add(message.pk)
+
+            if superseded:
+                self.published_class.objects.filter(pk__in=superseded).update(status=StatusChoice.SUPERSEDED)
+                _logger.info("%s message(s) superseded by newer messages", len(superseded))
+
+            for message in chunk:
+                if message.pk not in superseded:
+                    yield message
+
+    @cached_property
+    def claim_strategy(self):
+        return get_claim_strategy()
+
+    def _waiting(self, seconds=None):
+        sleep(settings.DEFAULT_PRODUCER_WAITING_TIME if seconds is None else seconds)
+
+    def _get_waiting_time(self):
+        """
+        Seconds until the next scheduled message is due, so a delayed message is published on time instead of on the
+        next poll. Capped by DEFAULT_PRODUCER_MAX_WAITING_TIME, which is also the wait when nothing is scheduled.
+        """
+        now = timezone.now()
+        next_publish_at = self.published_class.objects.filter(
+            status=StatusChoice.SCHEDULE, expires_at__gte=now, **self._get_priority_lookups()
+        ).aggregate(next_publish_at=Min("publish_at"))["next_publish_at"]
+        if next_publish_at is None:
+            return settings.DEFAULT_PRODUCER_MAX_WAITING_TIME
+        return min(max((next_publish_at - now).total_seconds(), 0), settings.DEFAULT_PRODUCER_MAX_WAITING_TIME)
 
     def publish_message_from_database(self):
         try:
-            objects_to_publish = self.published_class.objects.filter(
-                status=StatusChoice.SCHEDULE, expires_at__gte=timezone.now()
+            objects_to_publish = (
+                self.published_class.objects.filter(
+                    status=StatusChoice.SCHEDULE,
+                    expires_at__gte=timezone.now(),
+                    publish_at__lte=timezone.now(),
+                    **self._get_priority_lookups(),
+                )
+                .order_by("-priority", "added")
+                .only(*PUBLISH_FIELDS)
             )
 
             if not objects_to_publish.exists():
                 _logger.debug("No objects to publish")
-                self._waiting()
+                self._waiting(self._get_waiting_time())
                 return
 
             self.start()
 
-            with transaction.atomic():
-                published = objects_to_publish.select_for_update(skip_locked=True).iterator(
-                    chunk_size=settings.DEFAULT_PUBLISHED_CHUNK_SIZE
-                )
-
-                for message in published:
+            skipped = []
+            with self.claim_strategy.claim(objects_to_publish) as published:
+                for message in self._compact(published):
                     message_id = message.id
 
                     # Double-check status in case another worker processed it between queries
                     if message.status != StatusChoice.SCHEDULE:
                         continue
 
-                    _logger.debug("Message to published with body: %s", message.body)
+                    # Rate limited or unhealthy destinations are left SCHEDULE for a next poll
+                    if not self.throttle.allow(message.destination):
+                        skipped.append(message_id)
+                        continue
+
+                    _logger.debug("Message to published with id: %s", message_id)
 
                     try:
                         attempts = self.send(message)
+                    except DestinationUnavailableException:
+                        _logger.warning("Destination %s unavailable, message %s left", message.destination, message_id)
+                        skipped.append(message_id)
+                        continue
                     except ExceededSendAttemptsException as exc:
                         _logger.exception("Exceeded send attempts")
                         message.retry = exc.attempts
@@ -138,12 +275,20 @@ class Producer(Base):
                         message.retry = attempts
                         message.status = StatusChoice.SUCCEEDED
                         _logger.info(f"Message published with id: {message_id}")
-                    finally:
-                        message.save()
+                    message.save(update_fields=["status", "retry", "expires_at"])
+
+                if skipped:
+                    _logger.debug("%s message(s) left for the next poll", len(skipped))
+                    self.claim_strategy.release(self.published_class.objects.filter(pk__in=skipped))
 
+            # Outside of the claim transaction, so each window of the purge is committed on its own
+            self._remove_old_messages()
             self.stop()
         except DatabaseError:
             _logger.info("Starting publisher 🤔.")
             self._waiting()
         else:
-            self._waiting()
+            # The claim stopped at a full chunk, the next one is claimed right away. Not when messages were left, the
+            # same ones would be claimed again without waiting for the rate limits or circuits
+            if not getattr(self.claim_strategy, "has_more", False) or skipped:
+                self._waiting()
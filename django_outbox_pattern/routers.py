@@ -0,0 +1,25 @@
+from django_outbox_pattern import settings
+
+
+class OutboxRouter:
+    """
+    Routes the models of django_outbox_pattern, including their migrations, to DEFAULT_OUTBOX_DATABASE.
+
+    Add "django_outbox_pattern.routers.OutboxRouter" to DATABASE_ROUTERS when the outbox tables are not on the
+    default database.
+    """
+
+    app_label = "django_outbox_pattern"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            return settings.DEFAULT_OUTBOX_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == self.app_label:
+            return db == settings.DEFAULT_OUTBOX_DATABASE
+        return None
@@ -48,3 +48,35 @@ OUTBOX_PATTERN_CONSUMER_CACHE_KEY = DJANGO_OUTBOX_PATTERN.get(
     "OUTBOX_PATTERN_CONSUMER_CACHE_KEY", "remove_old_messages_django_outbox_pattern_consumer"
 )
 DEFAULT_PRODUCER_WAITING_TIME = int(DJANGO_OUTBOX_PATTERN.get("DEFAULT_PRODUCER_WAITING_TIME", 1))
+DEFAULT_PUBLISHED_SEND_ON_COMMIT = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PUBLISHED_SEND_ON_COMMIT", False)
+DEFAULT_PRODUCER_POOL_SIZE = int(DJANGO_OUTBOX_PATTERN.get("DEFAULT_PRODUCER_POOL_SIZE", 10))
+DEFAULT_PRODUCER_POOL_IDLE_TIMEOUT = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PRODUCER_POOL_IDLE_TIMEOUT", 300)
+DEFAULT_PRODUCER_POOL_ACQUIRE_TIMEOUT = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PRODUCER_POOL_ACQUIRE_TIMEOUT", 10)
+DEFAULT_CONSUMER_SUBSCRIPTIONS = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CONSUMER_SUBSCRIPTIONS", {})
+DEFAULT_CONSUMER_RETRY_DELAYS = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CONSUMER_RETRY_DELAYS", [])
+DEFAULT_ID_GENERATOR = DJANGO_OUTBOX_PATTERN.get("DEFAULT_ID_GENERATOR", "uuid.uuid4")
+DEFAULT_RECEIVED_COMPACT_MSG_ID = DJANGO_OUTBOX_PATTERN.get("DEFAULT_RECEIVED_COMPACT_MSG_ID", False)
+DEFAULT_ADDED_BRIN_INDEX = DJANGO_OUTBOX_PATTERN.get("DEFAULT_ADDED_BRIN_INDEX", False)
+REMOVE_DATA_RANGE_HOURS = DJANGO_OUTBOX_PATTERN.get("REMOVE_DATA_RANGE_HOURS", 24)
+DEFAULT_INBOX_BATCH_SIZE = DJANGO_OUTBOX_PATTERN.get("DEFAULT_INBOX_BATCH_SIZE", 100)
+DEFAULT_INBOX_FLUSH_INTERVAL = DJANGO_OUTBOX_PATTERN.get("DEFAULT_INBOX_FLUSH_INTERVAL", 1)
+DEFAULT_OUTBOX_DATABASE = DJANGO_OUTBOX_PATTERN.get("DEFAULT_OUTBOX_DATABASE", "default")
+DEFAULT_CDC_SLOT_NAME = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CDC_SLOT_NAME", "django_outbox_pattern")
+DEFAULT_PUBLISHED_CLAIM_STRATEGY = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PUBLISHED_CLAIM_STRATEGY", None)
+DEFAULT_PUBLISHED_LEASE_TIME = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PUBLISHED_LEASE_TIME", 300)
+DEFAULT_PUBLISHED_ENCODED_BODY = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PUBLISHED_ENCODED_BODY", False)
+DEFAULT_PUBLISHED_RATE_LIMITS = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PUBLISHED_RATE_LIMITS", {})
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CIRCUIT_BREAKER_THRESHOLD", 0)
+DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT", 30)
+DEFAULT_STOMP_BALANCER = DJANGO_OUTBOX_PATTERN.get("DEFAULT_STOMP_BALANCER", "failover")
+DEFAULT_STOMP_NODE_RETRY_TIME = DJANGO_OUTBOX_PATTERN.get("DEFAULT_STOMP_NODE_RETRY_TIME", 30)
+DEFAULT_CLAIM_CHECK_THRESHOLD = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CLAIM_CHECK_THRESHOLD", None)
+DEFAULT_CLAIM_CHECK_STORE = DJANGO_OUTBOX_PATTERN.get(
+    "DEFAULT_CLAIM_CHECK_STORE", "django_outbox_pattern.blobs.StorageBlobStore"
+)
+DEFAULT_CLAIM_CHECK_STORAGE = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CLAIM_CHECK_STORAGE", "default")
+DEFAULT_CLAIM_CHECK_PREFIX = DJANGO_OUTBOX_PATTERN.get("DEFAULT_CLAIM_CHECK_PREFIX", "django_outbox_pattern/")
+DEFAULT_PRODUCER_MAX_WAITING_TIME = DJANGO_OUTBOX_PATTERN.get(
+    "DEFAULT_PRODUCER_MAX_WAITING_TIME", DEFAULT_PRODUCER_WAITING_TIME
+)
+DEFAULT_PRODUCER_RECEIPT_TIMEOUT = DJANGO_OUTBOX_PATTERN.get("DEFAULT_PRODUCER_RECEIPT_TIMEOUT", 10)
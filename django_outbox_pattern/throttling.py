@@ -0,0 +1,125 @@
+import logging
+
+from time import monotonic
+
+from django_outbox_pattern import settings
+
+_logger = logging.getLogger("django_outbox_pattern")
+
+
+class TokenBucket:
+    """Allows up to rate acquisitions per second, with bursts of up to capacity"""
+
+    def __init__(self, rate, capacity=None, clock=monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+
+    def try_acquire(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after threshold consecutive failures and rejects every call for reset_timeout seconds. Then it is half-open:
+    a single call is let through as a probe, its success closes the circuit and its failure opens it again. A probe
+    that is never reported, for instance because the caller did not make the call after all, is replaced by a new one
+    after another reset_timeout seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold, reset_timeout, clock=monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.state == self.CLOSED:
+            return True
+        now = self.clock()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        self.state = self.HALF_OPEN
+        self.opened_at = now
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+    @property
+    def is_open(self):
+        return self.state == self.OPEN
+
+
+class DestinationThrottle:
+    """
+    Token bucket and circuit breaker of each destination, configured by DEFAULT_PUBLISHED_RATE_LIMITS and
+    DEFAULT_CIRCUIT_BREAKER_THRESHOLD. Destinations without a rate limit are not limited, and the circuit breakers are
+    disabled when the threshold is 0.
+    """
+
+    def __init__(self, rate_limits=None, threshold=None, reset_timeout=None, clock=monotonic):
+        self.rate_limits = settings.DEFAULT_PUBLISHED_RATE_LIMITS if rate_limits is None else rate_limits
+        self.threshold = settings.DEFAULT_CIRCUIT_BREAKER_THRESHOLD if threshold is None else threshold
+        self.reset_timeout = settings.DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.clock = clock
+        self._buckets = {}
+        self._breakers = {}
+
+    def allow(self, destination):
+        """Whether a message can be sent to the destination now, taking a token of its rate limit when it can"""
+        breaker = self._get_breaker(destination)
+        if breaker is not None and not breaker.allow():
+            return False
+        bucket = self._get_bucket(destination)
+        return bucket is None or bucket.try_acquire()
+
+    def record_success(self, destination):
+        breaker = self._get_breaker(destination)
+        if breaker is not None:
+            breaker.record_success()
+
+    def record_failure(self, destination):
+        """Counts a failed send, returns True when the circuit of the destination is open"""
+        breaker = self._get_breaker(destination)
+        if breaker is None:
+            return False
+        breaker.record_failure()
+        if breaker.is_open:
+            _logger.warning("Circuit of destination %s opened for %s seconds", destination, self.reset_timeout)
+        return breaker.is_open
+
+    def _get_bucket(self, destination):
+        if destination not in self.rate_limits:
+            return None
+        if destination not in self._buckets:
+            self._buckets[destination] = TokenBucket(self.rate_limits[destination], clock=self.clock)
+        return self._buckets[destination]
+
+    def _get_breaker(self, destination):
+        if not self.threshold:
+            return None
+        if destination not in self._breakers:
+            self._breakers[destination] = CircuitBreaker(self.threshold, self.reset_timeout, clock=self.clock)
+        return self._breakers[destination]
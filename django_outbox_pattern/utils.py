@@ -0,0 +1,75 @@
+import os
+import time
+import uuid
+
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils.module_loading import import_string
+
+from django_outbox_pattern import settings
+
+_MSG_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_OID, "django_outbox_pattern.msg_id")
+
+
+@lru_cache(maxsize=None)
+def cached_import_string(dotted_path):
+    """Same as django's import_string, but each dotted path from the settings is resolved only once per process"""
+    return import_string(dotted_path)
+
+
+def uuid7():
+    """
+    Generates a time-ordered UUID version 7 (RFC 9562): 48 bits of unix time in milliseconds followed by random bits.
+
+    Ids generated later sort after earlier ones, so inserts land at the end of the primary key index.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return uuid.UUID(int=value)
+
+
+def get_msg_digest(message_id):
+    """
+    Converts the message id into 16 bytes: the id itself when it is a UUID, which is the case for cap-msg-id and
+    dop-msg-id, otherwise a UUID version 5 hash of it.
+    """
+    if message_id is None:
+        return None
+    try:
+        return uuid.UUID(str(message_id))
+    except ValueError:
+        return uuid.uuid5(_MSG_ID_NAMESPACE, str(message_id))
+
+
+def delete_added_before(queryset, cutoff):
+    """
+    Deletes the rows of the queryset added before the cutoff, one window of REMOVE_DATA_RANGE_HOURS at a time.
+
+    Each delete is bounded on both sides of ``added``, so it can be answered by a BRIN index, and runs in its own
+    transaction, so it does not hold locks on the whole backlog at once. Call it outside of any other transaction.
+    """
+    queryset = queryset.filter(added__lt=cutoff)
+    start = queryset.aggregate(oldest=Min("added"))["oldest"]
+    if start is None:
+        return 0
+    window = timedelta(hours=settings.REMOVE_DATA_RANGE_HOURS)
+    deleted = 0
+    while start < cutoff:
+        end = min(start + window, cutoff)
+        with transaction.atomic(using=queryset.db):
+            deleted += queryset.filter(added__gte=start, added__lt=end).delete()[0]
+        start = end
+    return deleted
+
+
+def batched(iterable, size):
+    """Same as itertools.batched of Python 3.12, yields lists of up to size items"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
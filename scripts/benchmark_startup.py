@@ -0,0 +1,74 @@
+"""
+Measures the cold start cost of django_outbox_pattern.
+
+Each sample runs in a fresh interpreter so nothing is cached between runs:
+
+- import: time to import the library modules used by the management commands, after django.setup()
+- first message: time from django.setup() until the first message is accepted by the broker
+
+Usage:
+
+    DJANGO_SETTINGS_MODULE=tests.settings python scripts/benchmark_startup.py --runs 10
+    DJANGO_SETTINGS_MODULE=tests.settings python scripts/benchmark_startup.py --skip-broker
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_SAMPLE = """
+import time
+import django
+django.setup()
+start = time.perf_counter()
+import django_outbox_pattern.decorators
+import django_outbox_pattern.management.commands.publish
+import django_outbox_pattern.management.commands.subscribe
+print(time.perf_counter() - start)
+"""
+
+FIRST_MESSAGE_SAMPLE = """
+import time
+import django
+django.setup()
+start = time.perf_counter()
+from django_outbox_pattern.factories import factory_producer
+with factory_producer() as producer:
+    producer.send_event(destination="/topic/benchmark.startup", body={"benchmark": True})
+print(time.perf_counter() - start)
+"""
+
+
+def _run_sample(code):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=os.environ, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _report(name, samples):
+    samples_ms = [sample * 1000 for sample in samples]
+    print(
+        f"{name}: median {statistics.median(samples_ms):.1f} ms, "
+        f"min {min(samples_ms):.1f} ms, max {max(samples_ms):.1f} ms ({len(samples_ms)} runs)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters per measurement")
+    parser.add_argument("--skip-broker", action="store_true", help="Skip the first message latency measurement")
+    args = parser.parse_args()
+
+    if "DJANGO_SETTINGS_MODULE" not in os.environ:
+        parser.error("DJANGO_SETTINGS_MODULE must be set")
+
+    _report("import", [_run_sample(IMPORT_SAMPLE) for _ in range(args.runs)])
+    if not args.skip_broker:
+        _report("first message", [_run_sample(FIRST_MESSAGE_SAMPLE) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.contrib.admin import AdminSite
+from django.test import RequestFactory
+from django.test import TestCase
+
+from django_outbox_pattern.admin import EstimatedCountPaginator
+from django_outbox_pattern.admin import PublishedAdmin
+from django_outbox_pattern.admin import ReceivedAdmin
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.models import Published
+from django_outbox_pattern.models import Received
+from django_outbox_pattern.utils import get_msg_digest
+
+
+class PublishedAdminTest(TestCase):
+    def setUp(self):
+        self.admin = PublishedAdmin(Published, AdminSite())
+        self.request = RequestFactory().get("/")
+        self.published = Published.objects.create(destination="destination", body={"message": "x" * 500})
+
+    def test_changelist_should_defer_json_columns_and_show_previews(self):
+        obj = self.admin.get_queryset(self.request).get()
+        self.assertEqual(obj.get_deferred_fields(), {"body", "encoded_body", "headers"})
+        self.assertEqual(len(self.admin.body_preview(obj)), 100)
+        self.assertTrue(self.admin.body_preview(obj).startswith('{"message": "xxx'))
+
+    def test_changelist_should_order_by_primary_key_with_brin_index(self):
+        self.assertEqual(self.admin.get_ordering(self.request), ["-added"])
+        with patch("django_outbox_pattern.admin.settings.DEFAULT_ADDED_BRIN_INDEX", True):
+            self.assertEqual(self.admin.get_ordering(self.request), ["-pk"])
+
+    def test_changelist_should_preview_encoded_body(self):
+        Published.objects.all().update(body=None, encoded_body='{"encoded": true}')
+        obj = self.admin.get_queryset(self.request).get()
+        self.assertEqual(self.admin.body_preview(obj), '{"encoded": true}')
+
+    def test_search_should_match_id_exactly(self):
+        Published.objects.create(destination="other", body={})
+        queryset, may_have_duplicates = self.admin.get_search_results(
+            self.request, Published.objects.all(), str(self.published.id)
+        )
+        self.assertEqual(list(queryset), [self.published])
+        self.assertFalse(may_have_duplicates)
+
+    def test_search_should_match_destination_exactly(self):
+        Published.objects.create(destination="destination.v2", body={})
+        queryset, _ = self.admin.get_search_results(self.request, Published.objects.all(), "destination")
+        self.assertEqual(list(queryset), [self.published])
+
+    def test_requeue_failed_should_schedule_only_failed_messages(self):
+        Published.objects.filter(pk=self.published.pk).update(status=StatusChoice.FAILED, retry=10)
+        succeeded = Published.objects.create(destination="destination", body={}, status=StatusChoice.SUCCEEDED)
+
+        with patch.object(self.admin, "message_user") as message_user, self.assertNumQueries(1):
+            self.admin.requeue_failed(self.request, Published.objects.all())
+
+        message_user.assert_called_once_with(self.request, "1 message(s) scheduled to be published again.")
+        self.published.refresh_from_db()
+        self.assertEqual(self.published.status, StatusChoice.SCHEDULE)
+        self.assertEqual(self.published.retry, 0)
+        succeeded.refresh_from_db()
+        self.assertEqual(succeeded.status, StatusChoice.SUCCEEDED)
+
+
+class ReceivedAdminTest(TestCase):
+    def setUp(self):
+        self.admin = ReceivedAdmin(Received, AdminSite())
+        self.request = RequestFactory().get("/")
+
+    def test_changelist_should_read_destination_without_loading_headers(self):
+        Received.objects.create(msg_id="1", headers={"destination": "/queue/test"}, body={})
+        obj = self.admin.get_queryset(self.request).get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.admin.destination_header(obj), "/queue/test")
+
+    def test_search_should_match_msg_id_and_msg_digest(self):
+        by_msg_id = Received.objects.create(msg_id="message-1", body={})
+        by_digest = Received.objects.create(msg_digest=get_msg_digest("message-2"), body={})
+        Received.objects.create(msg_id="message-10", body={})
+
+        for search_term, expected in (("message-1", by_msg_id), ("message-2", by_digest)):
+            queryset, _ = self.admin.get_search_results(self.request, Received.objects.all(), search_term)
+            self.assertEqual(list(queryset), [expected])
+
+    def test_search_should_match_nothing_for_unknown_id(self):
+        Received.objects.create(msg_id="1", body={})
+        queryset, _ = self.admin.get_search_results(self.request, Received.objects.all(), str(uuid4()))
+        self.assertFalse(queryset.exists())
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def test_should_count_exactly_when_statistics_are_not_available(self):
+        Published.objects.create(destination="destination", body={})
+        paginator = EstimatedCountPaginator(Published.objects.order_by("added"), 10)
+        self.assertEqual(paginator.count, 1)
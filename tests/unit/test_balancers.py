@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from django_outbox_pattern.balancers import FailoverBalancer
+from django_outbox_pattern.balancers import LeastConnectionsBalancer
+from django_outbox_pattern.balancers import NodeHealth
+from django_outbox_pattern.balancers import RandomBalancer
+from django_outbox_pattern.balancers import RoundRobinBalancer
+from django_outbox_pattern.balancers import get_balancer
+from django_outbox_pattern.balancers import order_host_and_ports
+from django_outbox_pattern.factories import NODE_HEALTH_LISTENER_NAME
+from django_outbox_pattern.factories import factory_connection
+from django_outbox_pattern.listeners import NodeHealthListener
+
+NODES = [("node-1", 61613), ("node-2", 61613), ("node-3", 61613)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BalancerTest(SimpleTestCase):
+    def test_failover_should_keep_configured_order(self):
+        self.assertEqual(FailoverBalancer().order(NODES), NODES)
+
+    def test_round_robin_should_start_from_next_node(self):
+        balancer = RoundRobinBalancer()
+        start = NODES.index(balancer.order(NODES)[0])
+        expected = [NODES[(start + offset) % len(NODES)] for offset in range(1, 4)]
+        self.assertEqual([balancer.order(NODES)[0] for _ in range(3)], expected)
+
+    def test_fresh_balancers_should_spread_first_connections(self):
+        # Each instance stands for a new process opening its first connection
+        for balancer_factory in (RoundRobinBalancer, lambda: LeastConnectionsBalancer(NodeHealth())):
+            with self.subTest(balancer=balancer_factory):
+                first_nodes = {balancer_factory().order(NODES)[0] for _ in range(60)}
+                self.assertEqual(first_nodes, set(NODES))
+
+    def test_random_should_return_every_node(self):
+        self.assertCountEqual(RandomBalancer().order(NODES), NODES)
+
+    def test_least_connections_should_start_from_least_used_node(self):
+        health = NodeHealth()
+        health.connected(NODES[0])
+        health.connected(NODES[2])
+        health.connected(NODES[2])
+        self.assertEqual(LeastConnectionsBalancer(health).order(NODES), [NODES[1], NODES[0], NODES[2]])
+
+    def test_least_connections_should_break_ties_randomly(self):
+        health = NodeHealth()
+        health.connected(NODES[1])
+        orders = {tuple(LeastConnectionsBalancer(health).order(NODES)) for _ in range(60)}
+        self.assertEqual(orders, {(NODES[0], NODES[2], NODES[1]), (NODES[2], NODES[0], NODES[1])})
+
+    def test_should_resolve_balancer_by_name_or_dotted_path(self):
+        self.assertIsInstance(get_balancer("round_robin"), RoundRobinBalancer)
+        self.assertIs(get_balancer("round_robin"), get_balancer("round_robin"))
+        self.assertIsInstance(get_balancer("django_outbox_pattern.balancers.RandomBalancer"), RandomBalancer)
+
+
+class NodeHealthTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.health = NodeHealth(clock=self.clock)
+
+    def test_should_move_failed_nodes_to_the_end_until_retry_time(self):
+        self.health.failed(NODES[0])
+        self.assertEqual(order_host_and_ports(NODES, self.health), [NODES[1], NODES[2], NODES[0]])
+
+        self.clock.now = 30
+        self.assertEqual(order_host_and_ports(NODES, self.health), NODES)
+
+    def test_listener_should_track_connections_and_refused_nodes(self):
+        listener = NodeHealthListener(NODES, self.health)
+        listener.on_connecting(NODES[2])
+        listener.on_connected(None)
+
+        self.assertFalse(self.health.is_healthy(NODES[0]))
+        self.assertFalse(self.health.is_healthy(NODES[1]))
+        self.assertEqual(self.health.connections(NODES[2]), 1)
+
+        listener.on_disconnected()
+        listener.on_disconnected()
+        self.assertEqual(self.health.connections(NODES[2]), 0)
+
+
+class FactoryConnectionTest(SimpleTestCase):
+    def test_should_order_nodes_and_set_health_listener(self):
+        with (
+            patch("django_outbox_pattern.settings.DEFAULT_STOMP_HOST_AND_PORTS", NODES),
+            patch("django_outbox_pattern.settings.DEFAULT_STOMP_BALANCER", "least_connections"),
+            patch("django_outbox_pattern.balancers.node_health.connections", side_effect=[2, 0, 1]),
+            patch("django_outbox_pattern.factories.cached_import_string") as import_string,
+        ):
+            connection = factory_connection()
+
+        connection_class = import_string.return_value
+        self.assertEqual(connection_class.call_args.kwargs["host_and_ports"], [NODES[1], NODES[2], NODES[0]])
+        name, listener = connection.set_listener.call_args.args
+        self.assertEqual(name, NODE_HEALTH_LISTENER_NAME)
+        self.assertIsInstance(listener, NodeHealthListener)
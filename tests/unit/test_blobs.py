@@ -0,0 +1,64 @@
+import json
+
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.test import override_settings
+
+from django_outbox_pattern.blobs import CLAIM_CHECK_HEADER
+from django_outbox_pattern.blobs import StorageBlobStore
+from django_outbox_pattern.factories import factory_consumer
+from django_outbox_pattern.factories import factory_producer
+from django_outbox_pattern.models import Published
+from django_outbox_pattern.models import Received
+from django_outbox_pattern.payloads import Payload
+
+IN_MEMORY_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+LARGE_BODY = {"document": "x" * 100}
+
+
+@override_settings(STORAGES=IN_MEMORY_STORAGES)
+@patch("django_outbox_pattern.settings.DEFAULT_CLAIM_CHECK_THRESHOLD", 50)
+class ClaimCheckTest(TestCase):
+    def test_store_should_save_and_load_content(self):
+        store = StorageBlobStore()
+        reference = store.save('{"message": 1}')
+        self.assertTrue(reference.startswith("django_outbox_pattern/"))
+        self.assertEqual(store.load(reference), '{"message": 1}')
+
+    def test_should_offload_only_bodies_above_threshold(self):
+        small = Published.objects.create(destination="destination", body={"message": 1})
+        large = Published.objects.create(destination="destination", body=LARGE_BODY)
+
+        small.refresh_from_db()
+        large.refresh_from_db()
+        self.assertEqual(small.body, {"message": 1})
+        self.assertNotIn(CLAIM_CHECK_HEADER, small.headers)
+        self.assertIsNone(large.body)
+        self.assertEqual(json.loads(StorageBlobStore().load(large.headers[CLAIM_CHECK_HEADER])), LARGE_BODY)
+
+    def test_should_send_reference_and_fetch_body_on_consumer(self):
+        Published.objects.create(destination="destination", body=LARGE_BODY)
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            producer = factory_producer()
+            consumer = factory_consumer()
+        producer.publish_message_from_database()
+        sent = producer.connection.send.call_args.kwargs
+        self.assertEqual(sent["body"], "null")
+
+        bodies = []
+
+        def callback(payload: Payload):
+            bodies.append(payload.body)
+            payload.save()
+
+        consumer.callback = callback
+        consumer.message_handler(sent["body"], {**sent["headers"], "message-id": "1"})
+
+        self.assertEqual(bodies, [LARGE_BODY])
+        received = Received.objects.get()
+        self.assertIsNone(received.body)
+        self.assertIn(CLAIM_CHECK_HEADER, received.headers)
@@ -0,0 +1,125 @@
+import json
+
+from unittest.mock import Mock
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from django_outbox_pattern.cdc import CdcPublisher
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.exceptions import ExceededSendAttemptsException
+from django_outbox_pattern.models import Published
+
+
+def _message(change, data_start=100):
+    message = Mock()
+    message.payload = json.dumps(change)
+    message.data_start = data_start
+    return message
+
+
+def _insert(published_id, status=StatusChoice.SCHEDULE, **columns):
+    values = {
+        "id": str(published_id),
+        "destination": "/topic/destination.v1",
+        "body": json.dumps({"message": "cdc"}),
+        "headers": json.dumps({"dop-msg-id": str(published_id)}),
+        "status": status,
+        "retry": 0,
+        "added": "2024-01-31 12:00:00.123456",
+        "expires_at": "2024-02-01 12:00:00.123456",
+        "version": None,
+        "unknown_column": 1,
+        **columns,
+    }
+    return {
+        "action": "I",
+        "schema": "public",
+        "table": "published",
+        "columns": [{"name": name, "type": "text", "value": value} for name, value in values.items()],
+    }
+
+
+class CdcPublisherTest(TestCase):
+    def setUp(self):
+        self.producer = Mock()
+        self.publisher = CdcPublisher(self.producer, slot_name="slot")
+
+    def test_should_send_inserted_message_without_querying_the_table(self):
+        published_id = uuid4()
+        with self.assertNumQueries(0):
+            self.publisher.consume(_message(_insert(published_id)))
+
+        published = self.producer.send.call_args.args[0]
+        self.assertEqual(published.id, published_id)
+        self.assertEqual(published.destination, "/topic/destination.v1")
+        self.assertEqual(published.body, {"message": "cdc"})
+        self.assertEqual(published.headers, {"dop-msg-id": str(published_id)})
+
+    def test_should_confirm_position_only_at_commit(self):
+        insert = _message(_insert(uuid4()), data_start=100)
+        commit = _message({"action": "C"}, data_start=200)
+
+        self.publisher.consume(_message({"action": "B"}, data_start=90))
+        self.publisher.consume(insert)
+        insert.cursor.send_feedback.assert_not_called()
+
+        self.publisher.consume(commit)
+        commit.cursor.send_feedback.assert_called_once_with(flush_lsn=200)
+        self.producer._remove_old_messages.assert_called_once_with()
+
+    def test_should_reconnect_before_sending(self):
+        self.publisher.consume(_message(_insert(uuid4())))
+        self.producer.connect.assert_called_once_with()
+
+    def test_should_ignore_messages_not_scheduled(self):
+        self.publisher.consume(_message(_insert(uuid4(), status=StatusChoice.SUCCEEDED)))
+        self.publisher.consume(_message({"action": "D", "identity": []}))
+        self.producer.send.assert_not_called()
+
+    def test_should_send_message_requeued_by_update_from_the_table(self):
+        published = Published.objects.create(destination="destination", body={"message": "large body"})
+        update = {
+            "action": "U",
+            "columns": [
+                {"name": "id", "type": "uuid", "value": str(published.id)},
+                {"name": "status", "type": "integer", "value": StatusChoice.SCHEDULE},
+            ],
+        }
+        self.publisher.consume(_message(update))
+
+        self.assertEqual(self.producer.send.call_args.args[0].body, {"message": "large body"})
+
+    def test_should_mark_message_as_failed_when_send_attempts_are_exceeded(self):
+        published = Published.objects.create(destination="destination", body={})
+        self.producer.send.side_effect = ExceededSendAttemptsException(50)
+        with self.assertLogs("django_outbox_pattern", level="ERROR"):
+            self.publisher.consume(_message(_insert(published.id)))
+
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.FAILED)
+        self.assertEqual(published.retry, 50)
+
+    def test_should_filter_changes_of_the_outbox_table(self):
+        options = self.publisher._get_plugin_options()
+        self.assertEqual(options["add-tables"], "*.published")
+        self.assertEqual(options["format-version"], "2")
+
+    def test_should_require_postgresql(self):
+        with patch("django_outbox_pattern.cdc.psycopg2", Mock()):
+            with self.assertRaisesMessage(ImproperlyConfigured, "requires PostgreSQL"):
+                self.publisher.start()
+        self.producer.start.assert_not_called()
+
+    def test_should_refuse_send_on_commit(self):
+        with patch("django_outbox_pattern.cdc.settings.DEFAULT_PUBLISHED_SEND_ON_COMMIT", True):
+            with self.assertRaisesMessage(ImproperlyConfigured, "DEFAULT_PUBLISHED_SEND_ON_COMMIT"):
+                self.publisher.start()
+        self.producer.start.assert_not_called()
+
+    def test_should_require_psycopg2(self):
+        with patch("django_outbox_pattern.cdc.psycopg2", None):
+            with self.assertRaisesMessage(ImproperlyConfigured, "requires psycopg2"):
+                self.publisher.drop_slot()
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.utils import timezone
+
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.claims import MySQLLeaseClaim
+from django_outbox_pattern.claims import SingleWriterClaim
+from django_outbox_pattern.claims import SkipLockedClaim
+from django_outbox_pattern.claims import get_claim_strategy
+from django_outbox_pattern.models import Published
+
+CLAIMS_PATH = "django_outbox_pattern.claims"
+
+
+class GetClaimStrategyTest(TestCase):
+    def _get_strategy(self, vendor):
+        with patch(f"{CLAIMS_PATH}.connections") as connections:
+            connections.__getitem__.return_value.vendor = vendor
+            return get_claim_strategy()
+
+    def test_should_choose_strategy_by_database_vendor(self):
+        self.assertIsInstance(self._get_strategy("postgresql"), SkipLockedClaim)
+        self.assertIsInstance(self._get_strategy("oracle"), SkipLockedClaim)
+        self.assertIsInstance(self._get_strategy("mysql"), MySQLLeaseClaim)
+        self.assertIsInstance(self._get_strategy("sqlite"), SingleWriterClaim)
+
+    def test_should_use_configured_strategy(self):
+        with patch(f"{CLAIMS_PATH}.settings.DEFAULT_PUBLISHED_CLAIM_STRATEGY", f"{CLAIMS_PATH}.MySQLLeaseClaim"):
+            self.assertIsInstance(self._get_strategy("postgresql"), MySQLLeaseClaim)
+
+
+class MySQLLeaseClaimTest(TestCase):
+    def test_should_lease_a_chunk_with_a_single_update(self):
+        now = timezone.now()
+        queryset = Published.objects.filter(status=StatusChoice.SCHEDULE, expires_at__gte=now, priority__gte=5)
+        with (
+            patch(f"{CLAIMS_PATH}.connections") as connections,
+            patch(f"{CLAIMS_PATH}.transaction"),
+            patch(f"{CLAIMS_PATH}.settings.DEFAULT_PUBLISHED_CHUNK_SIZE", 50),
+        ):
+            database = connections.__getitem__.return_value
+            database.ops.quote_name.side_effect = lambda name: f"`{name}`"
+            database.ops.adapt_datetimefield_value.side_effect = lambda value: value
+            cursor = database.cursor.return_value.__enter__.return_value
+            cursor.rowcount = 50
+
+            claim = MySQLLeaseClaim()
+            with claim.claim(queryset) as published:
+                self.assertEqual(list(published), [])
+            self.assertTrue(claim.has_more)
+
+            cursor.rowcount = 49
+            with claim.claim(queryset):
+                pass
+            self.assertFalse(claim.has_more)
+
+        sql, params = cursor.execute.call_args.args
+        self.assertTrue(sql.startswith("UPDATE `published` SET `locked_by` = %s, `locked_until` = %s WHERE "))
+        self.assertIn("AND (`locked_until` IS NULL OR `locked_until` < %s)", sql)
+        self.assertTrue(sql.endswith("ORDER BY `priority` DESC, `added` LIMIT %s"))
+        self.assertEqual(params[-1], 50)
+        self.assertEqual(params[-2], params[1] - timedelta(seconds=300))
+        self.assertIn(StatusChoice.SCHEDULE, params)
+        self.assertIn(5, params[2:-2])
+
+    def test_requeue_should_release_the_lease(self):
+        published = Published.objects.create(destination="destination", body={}, status=StatusChoice.FAILED)
+        Published.objects.filter(pk=published.pk).update(locked_by="token", locked_until=timezone.now())
+
+        Published.objects.filter(pk=published.pk).requeue()
+
+        published.refresh_from_db()
+        self.assertIsNone(published.locked_by)
+        self.assertIsNone(published.locked_until)
+
+
+@override_settings(DEBUG=True)
+class SingleWriterClaimTest(TransactionTestCase):
+    def test_should_take_the_write_lock_before_reading(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SingleWriterClaim is only used on SQLite")
+
+        Published.objects.create(destination="destination", body={})
+        queryset = Published.objects.filter(status=StatusChoice.SCHEDULE)
+        connection.queries_log.clear()
+
+        with SingleWriterClaim().claim(queryset) as published:
+            self.assertEqual(len(list(published)), 1)
+
+        statements = [query["sql"] for query in connection.queries]
+        self.assertIn('UPDATE "published" SET status = status WHERE 1 = 0', statements)
+        self.assertLess(
+            statements.index('UPDATE "published" SET status = status WHERE 1 = 0'),
+            next(index for index, sql in enumerate(statements) if sql.startswith("SELECT")),
+        )
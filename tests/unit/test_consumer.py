@@ -1,5 +1,6 @@
 from unittest.mock import Mock
 from unittest.mock import patch
+from uuid import UUID
 from uuid import uuid4
 
 from django.db import transaction
@@ -9,8 +10,10 @@ from request_id_django_log import local_threading
 from stomp.exception import StompException
 
 from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.consumers import Subscription
 from django_outbox_pattern.consumers import _get_or_create_correlation_id
 from django_outbox_pattern.factories import factory_consumer
+from django_outbox_pattern.factories import factory_inbox_consumer
 from django_outbox_pattern.payloads import Payload
 
 
@@ -71,6 +74,32 @@ class ConsumerTest(TransactionTestCase):
             self.assertEqual(self.consumer.received_class.objects.filter(status=StatusChoice.SUCCEEDED).count(), 1)
             self.assertIn("Message with msg_id: 1 already exists. discarding the message", log.output[0])
 
+    def test_consumer_message_handler_should_not_decode_duplicated_message(self):
+        self.consumer.callback = lambda p: p.save()
+        self.consumer.message_handler('{"message": "message test"}', {"message-id": 1})
+
+        with patch("django_outbox_pattern.payloads.json.loads") as loads:
+            self.consumer.message_handler('{"message": "message test"}', {"message-id": 1})
+        loads.assert_not_called()
+
+    def test_consumer_message_handler_should_save_digest_when_compact_msg_id_is_enabled(self):
+        message_id = str(uuid4())
+        self.consumer.callback = lambda p: p.save()
+        with patch("django_outbox_pattern.settings.DEFAULT_RECEIVED_COMPACT_MSG_ID", True):
+            self.consumer.message_handler('{"message": "my message"}', {"dop-msg-id": message_id})
+        message = self.consumer.received_class.objects.get()
+        self.assertIsNone(message.msg_id)
+        self.assertEqual(UUID(message_id), message.msg_digest)
+
+    def test_consumer_message_handler_should_discard_duplicated_message_by_digest(self):
+        self.consumer.callback = lambda p: p.save()
+        with patch("django_outbox_pattern.settings.DEFAULT_RECEIVED_COMPACT_MSG_ID", True):
+            self.consumer.message_handler('{"message": "message test"}', {"message-id": "not-a-uuid"})
+            with self.assertLogs(level="INFO") as log:
+                self.consumer.message_handler('{"message": "message test"}', {"message-id": "not-a-uuid"})
+        self.assertEqual(self.consumer.received_class.objects.count(), 1)
+        self.assertIn("Message with msg_id: not-a-uuid already exists", log.output[0])
+
     def test_consumer_start(self):
         self.consumer.connection.is_connected.side_effect = [False, True]
         self.consumer.start(lambda p: p, "/topic/destination.v1")
@@ -95,7 +124,10 @@ class ConsumerTest(TransactionTestCase):
         self.assertEqual(self.consumer.connection.disconnect.call_count, 1)
 
     def test_consumer_message_handler_with_invalid_message(self):
-        self.consumer.callback = Mock(side_effect=Exception())
+        def callback(payload):
+            raise ValueError(payload.body)
+
+        self.consumer.callback = callback
         body_format_invalid = '{"message": "message with format invalid",}'
         with self.assertLogs() as captured:
             self.consumer.message_handler(body_format_invalid, {})
@@ -122,6 +154,155 @@ class ConsumerTest(TransactionTestCase):
         self.assertIsNone(local_threading.request_id)
 
 
+class ConsumerMultipleSubscriptionsTest(TransactionTestCase):
+    def setUp(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            self.consumer = factory_consumer()
+        self.consumer.connection.is_connected.side_effect = [False, True, True, True]
+        self.orders = Mock()
+        self.users = Mock()
+        self.subscriptions = [
+            Subscription(self.orders, "/topic/orders.v1"),
+            Subscription(self.users, "/topic/users.v1", "users"),
+        ]
+
+    def test_start_subscriptions_should_subscribe_all_destinations_on_one_connection(self):
+        self.consumer.start_subscriptions(self.subscriptions)
+        self.assertEqual(self.consumer.connection.connect.call_count, 1)
+        self.assertEqual(self.consumer.connection.subscribe.call_count, 4)
+        self.assertEqual(self.consumer.connection.unsubscribe.call_count, 2)
+        self.assertCountEqual(self.consumer.subscriptions.values(), self.subscriptions)
+
+    def test_restart_should_reuse_subscription_ids_without_creating_dlq_again(self):
+        self.consumer.start_subscriptions(self.subscriptions)
+        subscribe_ids = set(self.consumer.subscriptions)
+        self.consumer.restart()
+        self.assertEqual(set(self.consumer.subscriptions), subscribe_ids)
+        self.assertEqual(self.consumer.connection.subscribe.call_count, 6)
+        self.assertEqual(self.consumer.connection.unsubscribe.call_count, 2)
+
+    def test_message_handler_should_route_message_to_subscription_callback(self):
+        self.consumer.start_subscriptions(self.subscriptions)
+        users_id = next(key for key, value in self.consumer.subscriptions.items() if value.callback is self.users)
+        self.consumer.message_handler('{"id": 1}', {"message-id": "m-users", "subscription": users_id})
+        self.users.assert_called_once()
+        self.orders.assert_not_called()
+
+    def test_stop_should_unsubscribe_all_subscriptions(self):
+        self.consumer.start_subscriptions(self.subscriptions)
+        self.consumer.stop()
+        self.assertEqual(self.consumer.connection.unsubscribe.call_count, 4)
+        self.assertEqual(self.consumer.subscriptions, {})
+
+
+class ConsumerRetryTest(TransactionTestCase):
+    def setUp(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            self.consumer = factory_consumer()
+        self.consumer.connection.is_connected.side_effect = [False, True]
+        patcher = patch("django_outbox_pattern.settings.DEFAULT_CONSUMER_RETRY_DELAYS", [10, 60])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _failed_message(self, **headers):
+        self.consumer.start(Mock(side_effect=Exception("boom")), "/topic/destination.v1")
+        headers = {"message-id": "m1", "subscription": self.consumer.subscribe_id, "destination": "d", **headers}
+        with self.assertLogs("django_outbox_pattern", level="ERROR"):
+            self.consumer.message_handler('{"message": "retry"}', headers)
+
+    def test_start_should_create_one_retry_queue_per_delay(self):
+        self.consumer.start(lambda p: p, "/topic/destination.v1")
+
+        self.assertEqual(self.consumer.connection.subscribe.call_count, 4)
+        self.assertEqual(self.consumer.connection.unsubscribe.call_count, 3)
+        retry_calls = [c for c in self.consumer.connection.subscribe.call_args_list if c.args[0].startswith("RETRY.")]
+        self.assertEqual([c.args[0] for c in retry_calls], ["RETRY.10.destination.v1", "RETRY.60.destination.v1"])
+        headers = retry_calls[0].kwargs["headers"]
+        self.assertEqual(headers["x-message-ttl"], 10000)
+        self.assertEqual(headers["x-dead-letter-exchange"], "")
+        self.assertEqual(headers["x-dead-letter-routing-key"], "destination.v1")
+        self.assertNotIn("x-message-ttl", self.consumer.subscribe_headers)
+
+    def test_failed_message_should_be_sent_to_first_retry_queue(self):
+        self._failed_message()
+
+        self.consumer.connection.send.assert_called_once()
+        kwargs = self.consumer.connection.send.call_args.kwargs
+        self.assertEqual(kwargs["destination"], "/amq/queue/RETRY.10.destination.v1")
+        self.assertEqual(kwargs["body"], '{"message": "retry"}')
+        self.assertEqual(kwargs["headers"]["dop-retry-count"], 1)
+        self.assertNotIn("message-id", kwargs["headers"])
+        self.assertNotIn("subscription", kwargs["headers"])
+        self.consumer.connection.ack.assert_called_once_with("m1")
+        self.consumer.connection.nack.assert_not_called()
+
+    def test_failed_message_should_move_to_next_retry_tier(self):
+        self._failed_message(**{"dop-retry-count": "1"})
+
+        kwargs = self.consumer.connection.send.call_args.kwargs
+        self.assertEqual(kwargs["destination"], "/amq/queue/RETRY.60.destination.v1")
+        self.assertEqual(kwargs["headers"]["dop-retry-count"], 2)
+
+    def test_failed_message_should_go_to_dlq_after_last_retry_tier(self):
+        self._failed_message(**{"dop-retry-count": "2"})
+
+        self.consumer.connection.send.assert_not_called()
+        self.consumer.connection.nack.assert_called_once_with("m1", requeue=False)
+
+
+class InboxConsumerTest(TransactionTestCase):
+    def setUp(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            self.consumer = factory_inbox_consumer()
+        self.addCleanup(self.consumer.flush)
+
+    def _headers(self, message_id, subscription="s1"):
+        return {"message-id": message_id, "subscription": subscription, "destination": "/topic/destination"}
+
+    def test_should_prefetch_at_least_one_batch(self):
+        with patch("django_outbox_pattern.settings.DEFAULT_INBOX_BATCH_SIZE", 50):
+            with patch("django_outbox_pattern.factories.factory_connection"):
+                consumer = factory_inbox_consumer()
+        self.assertEqual(consumer.subscribe_headers["prefetch-count"], "50")
+
+    def test_should_store_batch_as_scheduled_and_ack_last_message_of_each_subscription(self):
+        with patch("django_outbox_pattern.settings.DEFAULT_INBOX_BATCH_SIZE", 3):
+            self.consumer.message_handler('{"message": 1}', self._headers("1"))
+            self.consumer.message_handler('{"message": 2}', self._headers("2", subscription="s2"))
+            self.consumer.connection.ack.assert_not_called()
+            self.consumer.message_handler('{"message": 3}', self._headers("3"))
+
+        received = self.consumer.received_class.objects.order_by("msg_id")
+        self.assertEqual([message.msg_id for message in received], ["1", "2", "3"])
+        self.assertEqual({message.status for message in received}, {StatusChoice.SCHEDULE})
+        self.assertCountEqual([c.args[0] for c in self.consumer.connection.ack.call_args_list], ["2", "3"])
+
+    def test_should_flush_partial_batch_after_interval(self):
+        with patch("django_outbox_pattern.settings.DEFAULT_INBOX_FLUSH_INTERVAL", 0.01):
+            self.consumer.message_handler('{"message": 1}', self._headers("1"))
+            self.consumer._timer.join(1)
+
+        self.assertEqual(self.consumer.received_class.objects.count(), 1)
+        self.consumer.connection.ack.assert_called_once_with("1")
+
+    def test_should_ignore_redelivered_messages(self):
+        self.consumer.received_class.objects.create(msg_id="1", status=StatusChoice.SUCCEEDED)
+        self.consumer.message_handler('{"message": 1}', self._headers("1"))
+        self.consumer.flush()
+
+        self.assertEqual(self.consumer.received_class.objects.get().status, StatusChoice.SUCCEEDED)
+        self.consumer.connection.ack.assert_called_once_with("1")
+
+    def test_should_nack_batch_when_it_cannot_be_stored(self):
+        self.consumer.message_handler('{"message": 1}', self._headers("1"))
+        with patch.object(self.consumer.received_class.objects, "bulk_create", side_effect=Exception("db down")):
+            with self.assertLogs("django_outbox_pattern", level="ERROR"):
+                self.consumer.flush()
+
+        self.consumer.connection.ack.assert_not_called()
+        self.consumer.connection.nack.assert_called_once_with("1", requeue=True)
+
+
 class GetOrCreateCorrelationIdTest(SimpleTestCase):
 
     def test_should_return_correlation_id_from_headers(self):
@@ -249,6 +430,26 @@ class ConsumerListenerRoutingTest(SimpleTestCase):
 
         consumer.handle_incoming_message.assert_called_once_with(frame.body, frame.headers)
 
+    def test_listener_on_message_ignores_unknown_subscription(self):
+        from django_outbox_pattern.factories import factory_consumer
+        from django_outbox_pattern.listeners import ConsumerListener
+
+        consumer = factory_consumer()
+        consumer.subscriptions = {"sub-1": Mock(), "sub-2": Mock()}
+        consumer.handle_incoming_message = Mock()
+
+        frame = Mock()
+        frame.body = "{}"
+        frame.headers = {"message-id": "m5", "subscription": "sub-3"}
+
+        listener = ConsumerListener(consumer)
+        listener.on_message(frame)
+        consumer.handle_incoming_message.assert_not_called()
+
+        frame.headers["subscription"] = "sub-2"
+        listener.on_message(frame)
+        consumer.handle_incoming_message.assert_called_once_with(frame.body, frame.headers)
+
 
 class ConsumerHeartbeatThreadingTest(SimpleTestCase):
     def setUp(self):
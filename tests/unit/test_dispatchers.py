@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from stomp.exception import StompException
+
+from django_outbox_pattern import dispatchers
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.decorators import Config
+from django_outbox_pattern.decorators import publish
+from django_outbox_pattern.dispatchers import send_on_commit
+from django_outbox_pattern.factories import factory_producer
+from django_outbox_pattern.models import Published
+from django_outbox_pattern.pools import ProducerPool
+
+User = get_user_model()
+
+
+class SendOnCommitTest(TestCase):
+    def setUp(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            self.producer = factory_producer()
+        patcher = patch.object(dispatchers, "producer_pool", ProducerPool(factory=lambda: self.producer))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_should_send_message_and_mark_as_succeeded_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            published = Published.objects.create(destination="destination", body={"message": "fast path"})
+            send_on_commit(published)
+            self.producer.connection.send.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.producer.connection.send.call_count, 1)
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SUCCEEDED)
+
+    def test_should_keep_message_scheduled_when_send_fails(self):
+        self.producer.connection.send.side_effect = StompException()
+        with self.assertLogs("django_outbox_pattern", level="WARNING") as log:
+            with self.captureOnCommitCallbacks(execute=True):
+                published = Published.objects.create(destination="destination", body={"message": "fast path"})
+                send_on_commit(published)
+
+        self.assertIn("left for the publisher", "\n".join(log.output))
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SCHEDULE)
+
+    def test_should_keep_message_scheduled_when_socket_fails(self):
+        self.producer.connection.send.side_effect = BrokenPipeError()
+        with self.assertLogs("django_outbox_pattern", level="WARNING"):
+            with self.captureOnCommitCallbacks(execute=True):
+                published = Published.objects.create(destination="destination", body={"message": "fast path"})
+                send_on_commit(published)
+
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SCHEDULE)
+
+    def test_should_not_send_message_already_processed_by_publisher(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            published = Published.objects.create(destination="destination", body={"message": "fast path"})
+            send_on_commit(published)
+            Published.objects.filter(pk=published.pk).update(status=StatusChoice.SUCCEEDED)
+
+        self.producer.connection.send.assert_not_called()
+
+    def test_should_not_send_message_leased_by_publisher(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            published = Published.objects.create(destination="destination", body={"message": "fast path"})
+            send_on_commit(published)
+            Published.objects.filter(pk=published.pk).update(
+                locked_by="publisher", locked_until=timezone.now() + timedelta(minutes=1)
+            )
+
+        self.producer.connection.send.assert_not_called()
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SCHEDULE)
+
+    def test_should_send_message_whose_lease_expired(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            published = Published.objects.create(destination="destination", body={"message": "fast path"})
+            send_on_commit(published)
+            Published.objects.filter(pk=published.pk).update(
+                locked_by="publisher", locked_until=timezone.now() - timedelta(minutes=1)
+            )
+
+        self.assertEqual(self.producer.connection.send.call_count, 1)
+
+    def test_decorator_should_send_on_commit_when_enabled(self):
+        user_publish = publish([Config(destination="destination")])(User)
+        with patch("django_outbox_pattern.settings.DEFAULT_PUBLISHED_SEND_ON_COMMIT", True):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                user_publish.objects.create(username="test")
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Published.objects.get().status, StatusChoice.SUCCEEDED)
+
+    def test_decorator_should_not_send_on_commit_when_disabled(self):
+        user_publish = publish([Config(destination="destination")])(User)
+        with self.captureOnCommitCallbacks() as callbacks:
+            user_publish.objects.create(username="test")
+
+        self.assertEqual(len(callbacks), 0)
+        self.assertEqual(Published.objects.get().status, StatusChoice.SCHEDULE)
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from uuid import uuid4
 
 from django.test import TransactionTestCase
@@ -36,3 +37,19 @@ class PublishedTest(TransactionTestCase):
             destination="destination", body={"message": "Message test"}, headers={"custom": "xpto-lalala"}
         )
         self.assertIn("dop-correlation-id", published.headers)
+
+    def test_published_should_use_uuid4_ids_by_default(self):
+        published = Published.objects.create(destination="destination", body={})
+        self.assertEqual(published.id.version, 4)
+
+    def test_published_and_received_should_use_configured_id_generator(self):
+        clock = iter(range(1_000_000_000, 5_000_000_000, 1_000_000_000))
+        with patch("django_outbox_pattern.settings.DEFAULT_ID_GENERATOR", "django_outbox_pattern.utils.uuid7"):
+            with patch("django_outbox_pattern.utils.time.time_ns", side_effect=lambda: next(clock)):
+                published = [Published.objects.create(destination="destination", body={}) for _ in range(3)]
+                received = Received.objects.create(msg_id="1")
+
+        self.assertEqual([p.id.version for p in published], [7, 7, 7])
+        self.assertEqual(received.id.version, 7)
+        ordered_ids = list(Published.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(ordered_ids, [p.id for p in sorted(published, key=lambda p: p.added)])
@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+class OutboxAddedIndexCommandTest(TestCase):
+    def test_should_refuse_databases_other_than_postgresql(self):
+        with self.assertRaisesRegex(CommandError, "only be changed on PostgreSQL"):
+            call_command("outbox_added_index", "brin")
+
+    def test_should_refuse_unknown_index_types(self):
+        with self.assertRaises(CommandError):
+            call_command("outbox_added_index", "hash")
+
+    def test_should_rebuild_an_invalid_index_before_dropping_the_old_one(self):
+        connection = MagicMock(vendor="postgresql")
+        cursor = connection.cursor.return_value.__enter__.return_value
+        command = "django_outbox_pattern.management.commands.outbox_added_index"
+        with (
+            patch(f"{command}.connections", {"default": connection}),
+            patch(
+                f"{command}._added_indexes",
+                side_effect=lambda _, table, index_type: [f"{table}_old"] * (index_type == "btree"),
+            ),
+            patch(f"{command}._is_valid", side_effect=[False, True, False, True]),
+        ):
+            call_command("outbox_added_index", "brin", stdout=StringIO())
+
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(
+            [
+                'DROP INDEX CONCURRENTLY IF EXISTS "published_added_brin"',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS "published_added_brin" ON "published" USING brin ("added")',
+                'DROP INDEX CONCURRENTLY IF EXISTS "published_old"',
+                'DROP INDEX CONCURRENTLY IF EXISTS "received_added_brin"',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS "received_added_brin" ON "received" USING brin ("added")',
+                'DROP INDEX CONCURRENTLY IF EXISTS "received_old"',
+            ],
+            statements,
+        )
+
+    def test_should_keep_the_old_index_when_the_new_one_is_not_valid(self):
+        connection = MagicMock(vendor="postgresql")
+        cursor = connection.cursor.return_value.__enter__.return_value
+        command = "django_outbox_pattern.management.commands.outbox_added_index"
+        with (
+            patch(f"{command}.connections", {"default": connection}),
+            patch(f"{command}._added_indexes", return_value=["published_added_id"]),
+            patch(f"{command}._is_valid", side_effect=[None, False]),
+        ):
+            with self.assertRaisesRegex(CommandError, "not valid, the old index is kept"):
+                call_command("outbox_added_index", "brin", stdout=StringIO())
+
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertNotIn('DROP INDEX CONCURRENTLY IF EXISTS "published_added_id"', statements)
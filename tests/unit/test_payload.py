@@ -1,8 +1,13 @@
+import json
+
 from unittest.mock import MagicMock
+from unittest.mock import patch
 
 from django.test import TestCase
 
+from django_outbox_pattern.choices import StatusChoice
 from django_outbox_pattern.models import Received
+from django_outbox_pattern.payloads import InboxPayload
 from django_outbox_pattern.payloads import Payload
 
 
@@ -65,3 +70,43 @@ class PayloadTest(TestCase):
         self.assertTrue(payload.acked)
         mock_connection.ack.assert_called_once_with(message_id)
         mock_connection.nack.assert_not_called()
+
+    def test_should_decode_body_once_on_first_access(self):
+        payload = Payload(None, '{"message": 1}', {})
+        with patch("django_outbox_pattern.payloads.json.loads", wraps=json.loads) as loads:
+            loads.assert_not_called()
+            self.assertEqual(payload.body, {"message": 1})
+            self.assertEqual(payload.body, {"message": 1})
+        loads.assert_called_once_with('{"message": 1}')
+        self.assertEqual(payload.raw_body, '{"message": 1}')
+
+    def test_should_keep_raw_body_when_it_is_not_json(self):
+        payload = Payload(None, "not json", {})
+        with self.assertLogs("django_outbox_pattern", level="ERROR"):
+            self.assertEqual(payload.body, "not json")
+
+    def test_should_create_message_on_first_access(self):
+        message_factory = MagicMock(return_value=Received())
+        payload = Payload(None, "{}", {}, message_factory=message_factory)
+        message_factory.assert_not_called()
+        self.assertIs(payload.message, payload.message)
+        message_factory.assert_called_once_with()
+
+
+class InboxPayloadTest(TestCase):
+    def setUp(self):
+        self.message = Received.objects.create(msg_id="1", body={"message": 1}, status=StatusChoice.SCHEDULE)
+        self.payload = InboxPayload(self.message)
+
+    def test_should_expose_stored_body_and_headers(self):
+        self.assertEqual(self.payload.body, {"message": 1})
+        self.assertIs(self.payload.message, self.message)
+
+    def test_ack_should_not_touch_the_broker(self):
+        self.payload.ack()
+        self.assertTrue(self.payload.acked)
+
+    def test_nack_should_mark_message_as_failed(self):
+        self.payload.nack()
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, StatusChoice.FAILED)
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from stomp.exception import StompException
+
+from django_outbox_pattern.exceptions import ProducerPoolExhaustedException
+from django_outbox_pattern.pools import ProducerPool
+
+
+def _producer(connected=True):
+    producer = Mock()
+    producer.is_connected.return_value = connected
+    return producer
+
+
+class ProducerPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = Mock(side_effect=lambda: _producer())
+
+    def test_should_reuse_idle_producer(self):
+        pool = ProducerPool(factory=self.factory, max_size=2)
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+        self.assertIs(first, second)
+        self.factory.assert_called_once()
+
+    def test_should_hand_different_producers_to_concurrent_users(self):
+        pool = ProducerPool(factory=self.factory, max_size=2)
+        with pool.acquire() as first:
+            with pool.acquire() as second:
+                self.assertIsNot(first, second)
+
+    def test_should_raise_when_pool_is_exhausted(self):
+        pool = ProducerPool(factory=self.factory, max_size=1, acquire_timeout=0)
+        with pool.acquire():
+            with self.assertRaises(ProducerPoolExhaustedException):
+                with pool.acquire():
+                    pass
+
+    def test_should_wait_for_a_producer_to_be_released(self):
+        pool = ProducerPool(factory=self.factory, max_size=1, acquire_timeout=5)
+        acquired = threading.Event()
+
+        def hold():
+            with pool.acquire():
+                acquired.set()
+                time.sleep(0.1)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        acquired.wait(1)
+        with pool.acquire() as producer:
+            self.assertIsNotNone(producer)
+        holder.join()
+        self.factory.assert_called_once()
+
+    def test_should_connect_producer_that_is_not_connected(self):
+        producer = _producer(connected=False)
+        pool = ProducerPool(factory=lambda: producer, max_size=1)
+        with pool.acquire():
+            pass
+        producer.connect_once.assert_called_once()
+
+    def test_should_not_keep_producer_that_failed_to_connect(self):
+        producer = _producer(connected=False)
+        producer.connect_once.side_effect = StompException()
+        pool = ProducerPool(factory=lambda: producer, max_size=1, acquire_timeout=0)
+        with self.assertRaises(StompException):
+            with pool.acquire():
+                pass
+        # The slot must be released even though the checkout failed
+        producer.connect_once.side_effect = None
+        with pool.acquire():
+            pass
+
+    def test_should_discard_producer_after_stomp_exception(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with self.assertRaises(StompException):
+            with pool.acquire() as broken:
+                raise StompException()
+        broken.stop.assert_called_once()
+        with pool.acquire() as producer:
+            self.assertIsNot(producer, broken)
+
+    def test_should_discard_producer_after_socket_error(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with self.assertRaises(BrokenPipeError):
+            with pool.acquire() as broken:
+                raise BrokenPipeError()
+        with pool.acquire() as producer:
+            self.assertIsNot(producer, broken)
+
+    def test_should_not_keep_producer_disconnected_while_in_use(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with pool.acquire() as disconnected:
+            disconnected.is_connected.return_value = False
+        with pool.acquire() as producer:
+            self.assertIsNot(producer, disconnected)
+
+    def test_should_keep_producer_after_other_exceptions(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with self.assertRaises(ValueError):
+            with pool.acquire() as first:
+                raise ValueError()
+        with pool.acquire() as second:
+            self.assertIs(first, second)
+
+    def test_should_evict_idle_producers(self):
+        pool = ProducerPool(factory=self.factory, max_size=1, idle_timeout=0)
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+        self.assertIsNot(first, second)
+        first.stop.assert_called_once()
+
+    def test_should_drop_producers_inherited_from_parent_process(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with pool.acquire() as parent_producer:
+            pass
+        with patch("django_outbox_pattern.pools.os.getpid", return_value=-1):
+            with pool.acquire() as child_producer:
+                pass
+        self.assertIsNot(parent_producer, child_producer)
+        parent_producer.stop.assert_not_called()
+
+    def test_close_should_disconnect_idle_producers(self):
+        pool = ProducerPool(factory=self.factory, max_size=1)
+        with pool.acquire() as producer:
+            pass
+        pool.close()
+        producer.stop.assert_called_once()
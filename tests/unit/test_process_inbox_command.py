@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from django_outbox_pattern import settings
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.consumers import remove_old_received
+from django_outbox_pattern.management.commands.process_inbox import Command
+from django_outbox_pattern.models import Received
+
+
+def save_callback(payload):
+    payload.save()
+
+
+class ProcessInboxCommandTest(TestCase):
+    def setUp(self):
+        self.command = Command()
+
+    def _create(self, msg_id, destination="/topic/destination", status=StatusChoice.SCHEDULE):
+        return Received.objects.create(
+            msg_id=msg_id, body={"message": msg_id}, headers={"destination": destination}, status=status
+        )
+
+    def _statuses(self):
+        return dict(Received.objects.values_list("msg_id", "status"))
+
+    def test_should_run_callback_on_scheduled_messages(self):
+        self._create("1")
+        self._create("2", status=StatusChoice.SUCCEEDED)
+        bodies = []
+
+        def callback(payload):
+            bodies.append(payload.body)
+            payload.save()
+
+        self.assertEqual(self.command._process_batch(callback, batch_size=10), 1)
+
+        self.assertEqual(bodies, [{"message": "1"}])
+        self.assertEqual(self._statuses(), {"1": StatusChoice.SUCCEEDED, "2": StatusChoice.SUCCEEDED})
+
+    def test_should_claim_at_most_batch_size_messages(self):
+        for msg_id in ("1", "2", "3"):
+            self._create(msg_id)
+        self.assertEqual(self.command._process_batch(save_callback, batch_size=2), 2)
+        self.assertEqual(Received.objects.filter(status=StatusChoice.SCHEDULE).count(), 1)
+
+    def test_should_filter_by_destination(self):
+        self._create("1")
+        self._create("2", destination="/topic/other")
+        self.command._process_batch(save_callback, batch_size=10, destination="/topic/other")
+        self.assertEqual(self._statuses(), {"1": StatusChoice.SCHEDULE, "2": StatusChoice.SUCCEEDED})
+
+    def test_should_mark_message_as_failed_and_keep_processing_batch(self):
+        self._create("1")
+        self._create("2")
+
+        def callback(payload):
+            payload.save()
+            if payload.body["message"] == "1":
+                raise ValueError("boom")
+
+        with self.assertLogs("django_outbox_pattern", level="ERROR"):
+            self.command._process_batch(callback, batch_size=10)
+
+        self.assertEqual(self._statuses(), {"1": StatusChoice.FAILED, "2": StatusChoice.SUCCEEDED})
+        self.assertEqual(Received.objects.get(msg_id="1").retry, 1)
+
+    def test_should_mark_message_as_failed_when_neither_saved_nor_nacked(self):
+        self._create("1")
+        with self.assertLogs("django_outbox_pattern", level="WARNING"):
+            self.command._process_batch(lambda payload: None, batch_size=10)
+        self.assertEqual(self._statuses(), {"1": StatusChoice.FAILED})
+
+    def test_should_stop_workers(self):
+        def process_batch(command, *args):
+            command.running = False
+            return 0
+
+        with (
+            patch.object(Command, "_process_batch", autospec=True, side_effect=process_batch) as mock_process_batch,
+            patch("django_outbox_pattern.management.commands.process_inbox.db.connections.close_all"),
+        ):
+            with self.assertLogs("django_outbox_pattern", level="INFO") as log:
+                call_command("process_inbox", "tests.unit.test_process_inbox_command.save_callback", "--workers", "2")
+
+        self.assertIn("Inbox processing stopped", "\n".join(log.output))
+        self.assertGreaterEqual(mock_process_batch.call_count, 1)
+
+    def test_should_purge_old_messages_except_the_scheduled_ones(self):
+        scheduled = self._create("1")
+        self._create("2", status=StatusChoice.SUCCEEDED)
+        Received.objects.update(added=timezone.now() - timedelta(days=settings.DAYS_TO_KEEP_DATA + 1))
+
+        with patch("django_outbox_pattern.consumers.cache") as cache:
+            cache.get.return_value = None
+            remove_old_received(Received)
+
+        self.assertEqual(list(Received.objects.values_list("pk", flat=True)), [scheduled.pk])
+
+    def test_should_reject_unknown_callback(self):
+        with self.assertRaises(CommandError):
+            call_command("process_inbox", "unknown.callback")
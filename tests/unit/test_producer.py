@@ -1,17 +1,24 @@
+from datetime import timedelta
 from unittest.mock import Mock
 from unittest.mock import patch
 from uuid import uuid4
 
+from django.test import SimpleTestCase
 from django.test import TestCase
 from django.test import TransactionTestCase
+from django.utils import timezone
 from request_id_django_log import local_threading
 from stomp.exception import StompException
+from stomp.utils import Frame
 
 from django_outbox_pattern import settings
 from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.exceptions import DestinationUnavailableException
 from django_outbox_pattern.exceptions import ExceededSendAttemptsException
 from django_outbox_pattern.factories import factory_producer
+from django_outbox_pattern.listeners import ReceiptListener
 from django_outbox_pattern.models import Published
+from django_outbox_pattern.throttling import DestinationThrottle
 
 
 class ProducerTest(TestCase):
@@ -62,6 +69,12 @@ class ProducerTest(TestCase):
                 producer.send_event(destination="destination", body={"message": "Test send event"})
         self.assertEqual(producer.connection.send.call_count, 1)
 
+    def test_producer_send_event_once_should_not_retry(self):
+        self.producer.connection.send.side_effect = StompException()
+        with self.assertRaises(StompException):
+            self.producer.send_event_once(destination="destination", body={"message": "Test send event"})
+        self.assertEqual(self.producer.connection.send.call_count, 1)
+
     def test_producer_on_exceeded_send_attempts(self):
         settings.DEFAULT_WAIT_RETRY = 1
         settings.DEFAULT_PAUSE_FOR_RETRY = 1
@@ -109,6 +122,190 @@ class ProducerTest(TestCase):
         self.assertEqual(message1.status, StatusChoice.SUCCEEDED)
         self.assertEqual(message2.status, StatusChoice.SUCCEEDED)
 
+    def test_should_store_and_send_encoded_body(self):
+        with patch("django_outbox_pattern.settings.DEFAULT_PUBLISHED_ENCODED_BODY", True):
+            message = Published.objects.create(destination="destination", body={"message": "encoded"})
+
+        message = Published.objects.get(pk=message.pk)
+        self.assertIsNone(message.body)
+        self.assertEqual(message.encoded_body, '{"message": "encoded"}')
+
+        with patch.object(self.producer, "send", wraps=self.producer.send) as send:
+            self.producer.publish_message_from_database()
+
+        self.assertTrue({"version", "locked_by", "locked_until"} <= send.call_args.args[0].get_deferred_fields())
+        self.assertEqual(self.producer.connection.send.call_args.kwargs["body"], '{"message": "encoded"}')
+        message.refresh_from_db()
+        self.assertEqual(message.status, StatusChoice.SUCCEEDED)
+
+    def test_should_send_only_newest_message_of_each_compaction_key(self):
+        now = timezone.now()
+        messages = [
+            Published.objects.create(destination="destination", body={"version": index}, compaction_key=key)
+            for index, key in enumerate(["1", "1", "2", "1", None, None])
+        ]
+        for index, message in enumerate(messages):
+            Published.objects.filter(pk=message.pk).update(added=now - timedelta(minutes=10 - index))
+
+        with patch.object(self.producer, "send", return_value=0) as send:
+            self.producer.publish_message_from_database()
+
+        self.assertEqual(sorted(call.args[0].body["version"] for call in send.call_args_list), [2, 3, 4, 5])
+        statuses = dict(Published.objects.values_list("body__version", "status"))
+        self.assertEqual(statuses[0], StatusChoice.SUPERSEDED)
+        self.assertEqual(statuses[1], StatusChoice.SUPERSEDED)
+        self.assertEqual(statuses[3], StatusChoice.SUCCEEDED)
+
+    def test_should_publish_higher_priority_first_and_only_its_lane(self):
+        for priority in (0, 10, 5, 10):
+            Published.objects.create(destination="destination", body={"priority": priority}, priority=priority)
+
+        with patch.object(self.producer, "send", return_value=0) as send:
+            self.producer.publish_message_from_database()
+        self.assertEqual([call.args[0].priority for call in send.call_args_list], [10, 10, 5, 0])
+
+        Published.objects.update(status=StatusChoice.SCHEDULE)
+        self.producer.min_priority = 5
+        self.producer.max_priority = 9
+        with patch.object(self.producer, "send", return_value=0) as send:
+            self.producer.publish_message_from_database()
+        self.assertEqual([call.args[0].priority for call in send.call_args_list], [5])
+
+    def test_should_leave_messages_of_unavailable_destination_and_keep_draining(self):
+        broken = Published.objects.create(destination="broken", body={})
+        healthy = Published.objects.create(destination="healthy", body={})
+        self.producer.throttle = DestinationThrottle(rate_limits={}, threshold=1, reset_timeout=60)
+        self.producer.connection.send.side_effect = self._answer_with_receipt(refused={"broken"})
+
+        with self.assertLogs("django_outbox_pattern", level="WARNING"):
+            self.producer.publish_message_from_database()
+
+        broken.refresh_from_db()
+        healthy.refresh_from_db()
+        self.assertEqual(broken.status, StatusChoice.SCHEDULE)
+        self.assertEqual(healthy.status, StatusChoice.SUCCEEDED)
+        self.assertFalse(self.producer.throttle.allow("broken"))
+
+    def test_should_retry_refused_sends_without_pausing_until_the_circuit_opens(self):
+        self.producer.throttle = DestinationThrottle(rate_limits={}, threshold=5, reset_timeout=60)
+        self.producer.connection.send.side_effect = self._answer_with_receipt(refused={"broken"})
+
+        with (
+            patch("django_outbox_pattern.producers.sleep") as sleep,
+            patch.object(settings, "DEFAULT_MAXIMUM_RETRY_ATTEMPTS", 50),
+            self.assertRaises(DestinationUnavailableException) as context,
+        ):
+            self.producer.send_event(destination="broken", body={})
+
+        self.assertEqual(context.exception.attempts, 5)
+        sleep.assert_not_called()
+
+    def test_should_reconnect_before_each_attempt(self):
+        self.producer.connection.is_connected.return_value = False
+        self.producer.connection.send.side_effect = [StompException(), None]
+        with patch.object(settings, "DEFAULT_MAXIMUM_RETRY_ATTEMPTS", 2):
+            self.assertEqual(self.producer.send_event(destination="destination", body={}), 1)
+        self.assertEqual(self.producer.connection.connect.call_count, 2)
+
+    def _answer_with_receipt(self, refused):
+        """Emulates the broker: a RECEIPT for each send, an ERROR for the sends to the refused destinations"""
+
+        def send(destination, receipt, **kwargs):
+            frame = Frame("ERROR" if destination in refused else "RECEIPT", headers={"receipt-id": receipt})
+            if destination in refused:
+                self.producer.receipt_listener.on_error(frame)
+            else:
+                self.producer.receipt_listener.on_receipt(frame)
+
+        return send
+
+    def test_should_leave_rate_limited_messages_scheduled(self):
+        for _ in range(3):
+            Published.objects.create(destination="limited", body={})
+        self.producer.throttle = DestinationThrottle(rate_limits={"limited": 2}, threshold=0, reset_timeout=60)
+
+        self.producer.publish_message_from_database()
+
+        self.assertEqual(Published.objects.filter(status=StatusChoice.SUCCEEDED).count(), 2)
+        self.assertEqual(Published.objects.filter(status=StatusChoice.SCHEDULE).count(), 1)
+
+    def test_should_not_wait_when_the_claim_has_more_messages(self):
+        Published.objects.create(destination="destination", body={})
+        self.producer.claim_strategy.has_more = True
+        with patch.object(self.producer, "_waiting") as waiting:
+            self.producer.publish_message_from_database()
+        waiting.assert_not_called()
+
+        Published.objects.create(destination="destination", body={})
+        self.producer.claim_strategy.has_more = False
+        with patch.object(self.producer, "_waiting") as waiting:
+            self.producer.publish_message_from_database()
+        waiting.assert_called_once_with()
+
+    def test_should_publish_delayed_message_only_when_due(self):
+        published = Published.objects.create(
+            destination="destination", body={}, publish_at=timezone.now() + timedelta(minutes=10)
+        )
+
+        with patch.object(self.producer, "_waiting"):
+            self.producer.publish_message_from_database()
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SCHEDULE)
+        self.assertEqual(self.producer.connection.send.call_count, 0)
+
+        Published.objects.update(publish_at=timezone.now())
+        with patch.object(self.producer, "_waiting"):
+            self.producer.publish_message_from_database()
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SUCCEEDED)
+
+    def test_should_not_purge_delayed_messages_before_they_are_due(self):
+        delayed = Published.objects.create(
+            destination="destination", body={}, publish_at=timezone.now() + timedelta(days=settings.DAYS_TO_KEEP_DATA)
+        )
+        sent = Published.objects.create(destination="destination", body={}, status=StatusChoice.SUCCEEDED)
+        Published.objects.update(added=timezone.now() - timedelta(days=settings.DAYS_TO_KEEP_DATA + 1))
+
+        with patch("django_outbox_pattern.producers.cache") as cache:
+            cache.get.return_value = None
+            self.producer._remove_old_messages()
+
+        self.assertEqual(list(Published.objects.values_list("pk", flat=True)), [delayed.pk])
+        self.assertFalse(Published.objects.filter(pk=sent.pk).exists())
+
+    def test_should_wait_until_the_next_message_is_due(self):
+        Published.objects.create(destination="destination", body={}, publish_at=timezone.now() + timedelta(seconds=30))
+        with patch.object(settings, "DEFAULT_PRODUCER_MAX_WAITING_TIME", 60):
+            self.assertAlmostEqual(self.producer._get_waiting_time(), 30, delta=1)
+        with patch.object(settings, "DEFAULT_PRODUCER_MAX_WAITING_TIME", 5):
+            self.assertEqual(self.producer._get_waiting_time(), 5)
+
+        Published.objects.all().delete()
+        with patch.object(settings, "DEFAULT_PRODUCER_MAX_WAITING_TIME", 60):
+            self.assertEqual(self.producer._get_waiting_time(), 60)
+
+
+class ReceiptListenerTest(SimpleTestCase):
+    def setUp(self):
+        self.listener = ReceiptListener()
+        self.listener.expect("receipt-1")
+
+    def test_should_ignore_receipts_of_other_frames(self):
+        self.listener.on_receipt(Frame("RECEIPT", headers={"receipt-id": "receipt-0"}))
+        self.assertEqual(self.listener.wait(0), "No receipt after 0 seconds")
+
+    def test_should_succeed_on_its_receipt(self):
+        self.listener.on_receipt(Frame("RECEIPT", headers={"receipt-id": "receipt-1"}))
+        self.assertIsNone(self.listener.wait(0))
+
+    def test_should_fail_on_error_or_disconnection(self):
+        self.listener.on_error(Frame("ERROR", headers={"message": "access_refused"}))
+        self.assertEqual(self.listener.wait(0), "access_refused")
+
+        self.listener.expect("receipt-2")
+        self.listener.on_disconnected()
+        self.assertEqual(self.listener.wait(0), "Disconnected")
+
 
 class ProducerRaceConditionTest(TransactionTestCase):
     def setUp(self):
@@ -124,6 +321,8 @@ class ProducerRaceConditionTest(TransactionTestCase):
         with patch.object(self.producer.published_class.objects, "filter") as mock_filter:
             mock_queryset = Mock()
             mock_queryset.exists.return_value = True  # Pass the exists() check
+            mock_queryset.order_by.return_value = mock_queryset
+            mock_queryset.only.return_value = mock_queryset
             # Create a message that appears processed when we check its status
             processed_message = Published(id=message.id, status=StatusChoice.SUCCEEDED)
             mock_queryset.select_for_update.return_value.iterator.return_value = iter([processed_message])
@@ -141,6 +340,8 @@ class ProducerRaceConditionTest(TransactionTestCase):
         with patch.object(self.producer.published_class.objects, "filter") as mock_filter:
             mock_queryset = Mock()
             mock_queryset.exists.return_value = True  # Pass the exists() check
+            mock_queryset.order_by.return_value = mock_queryset
+            mock_queryset.only.return_value = mock_queryset
             mock_queryset.select_for_update.return_value.iterator.return_value = iter([])  # No messages available
             mock_filter.return_value = mock_queryset
 
@@ -165,6 +366,8 @@ class ProducerRaceConditionTest(TransactionTestCase):
         with patch.object(self.producer.published_class.objects, "filter") as mock_filter:
             mock_queryset = Mock()
             mock_queryset.exists.return_value = True  # Pass the exists() check
+            mock_queryset.order_by.return_value = mock_queryset
+            mock_queryset.only.return_value = mock_queryset
             mock_queryset.select_for_update.return_value.iterator.return_value = iter([message])
             mock_filter.return_value = mock_queryset
 
@@ -7,6 +7,7 @@ from django.core.management import call_command
 from django.db import DatabaseError
 from django.test import TestCase
 
+from django_outbox_pattern.factories import factory_producer
 from django_outbox_pattern.management.commands.publish import Command
 from django_outbox_pattern.models import Published
 
@@ -26,20 +27,35 @@ class PublishCommandTest(TestCase):
 
     def test_command_output_when_message_published(self):
         published = Published.objects.create(destination="test", body={})
-        with patch(f"{PUBLISH_COMMAND_PATH}.factory_producer"):
+        with patch("django_outbox_pattern.factories.factory_connection"):
             with self.assertLogs("django_outbox_pattern", level="INFO") as cm:
                 call_command("publish")
             self.assertIn(f"Message published with id: {str(published.id)}", "\n".join(cm.output))
 
     def test_command_on_database_error(self):
-        mock_published_class = MagicMock()
-        mock_published_class.objects.filter.side_effect = DatabaseError()
-        with patch.object(Command.producer, "published_class", mock_published_class):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            producer = factory_producer()
+        producer.published_class = MagicMock()
+        producer.published_class.objects.filter.side_effect = DatabaseError()
+        with patch(f"{PUBLISH_COMMAND_PATH}.factory_producer", return_value=producer):
             with self.assertLogs("django_outbox_pattern", level="INFO") as cm:
                 call_command("publish")
             self.assertIn("Starting publisher", "\n".join(cm.output))
 
+    def test_command_does_not_create_producer_on_import(self):
+        with patch(f"{PUBLISH_COMMAND_PATH}.factory_producer") as mock_factory:
+            command = Command()
+            mock_factory.assert_not_called()
+            self.assertIs(command.producer, command.producer)
+            mock_factory.assert_called_once()
+
     def test_command_on_keyboard_input_error(self):
         with patch.object(Command, "_publish", side_effect=KeyboardInterrupt()):
             with self.assertRaises(SystemExit):
                 call_command("publish")
+
+    def test_command_should_publish_only_priority_lane(self):
+        with patch(f"{PUBLISH_COMMAND_PATH}.factory_producer") as mock_factory:
+            call_command("publish", "--min-priority", "5", "--max-priority", "9")
+        self.assertEqual(mock_factory.return_value.min_priority, 5)
+        self.assertEqual(mock_factory.return_value.max_priority, 9)
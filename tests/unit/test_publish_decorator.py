@@ -1,8 +1,12 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.test import TestCase
 from django.utils import timezone
 
 from django_outbox_pattern.decorators import Config
+from django_outbox_pattern.decorators import coalesce
 from django_outbox_pattern.decorators import publish
 from django_outbox_pattern.models import Published
 
@@ -170,3 +174,119 @@ class PublisherDecoratorTestCase(TestCase):
                 "username": "test",
             },
         )
+
+    def test_when_compact_should_set_compaction_key(self):
+        user_publish = publish([Config(destination="compact", compact=True), Config(destination="destination")])(User)
+        self.create_user(user_publish)
+        user = user_publish.objects.get()
+        keys = dict(Published.objects.values_list("destination", "compaction_key"))
+        self.assertEqual(keys, {"compact": str(user.pk), "destination": None})
+
+    def test_when_delay_should_set_publish_at(self):
+        user_publish = publish([Config(destination="delayed", delay=timedelta(minutes=5)), Config(destination="now")])(
+            User
+        )
+        before = timezone.now()
+        self.create_user(user_publish)
+        publish_at = dict(Published.objects.values_list("destination", "publish_at"))
+        self.assertGreaterEqual(publish_at["delayed"], before + timedelta(minutes=5))
+        self.assertLess(publish_at["now"], before + timedelta(minutes=5))
+
+
+class CoalesceTestCase(TestCase):
+    def setUp(self):
+        self.user_publish = publish([Config(destination="destination", fields=["username"], version="v1")])(User)
+
+    def test_should_publish_only_the_last_save_of_each_object(self):
+        with transaction.atomic(), coalesce():
+            user = self.user_publish.objects.create(username="first")
+            other = self.user_publish.objects.create(username="other")
+            user.username = "last"
+            user.save()
+
+        published = Published.objects.all()
+        self.assertEqual(sorted(message.body["username"] for message in published), ["last", "other"])
+        self.assertEqual({message.body["id"] for message in published}, {user.pk, other.pk})
+        self.assertTrue(all(message.destination == "destination.v1" for message in published))
+        self.assertTrue(all(message.headers["dop-msg-destination"] == "destination.v1" for message in published))
+
+    def test_should_write_once_when_nested(self):
+        with coalesce():
+            user = self.user_publish.objects.create(username="first")
+            with coalesce():
+                user.save()
+            self.assertEqual(Published.objects.count(), 2)
+
+        self.assertEqual(Published.objects.count(), 1)
+
+    def test_should_not_write_when_transaction_of_block_rolls_back(self):
+        with self.assertRaises(ValueError), transaction.atomic(), coalesce():
+            self.user_publish.objects.create(username="first")
+            raise ValueError
+
+        self.assertFalse(Published.objects.exists())
+        self.user_publish.objects.create(username="second")
+        self.assertEqual(Published.objects.count(), 1)
+
+    def test_should_not_publish_saves_rolled_back_by_a_savepoint(self):
+        with transaction.atomic(), coalesce():
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.user_publish.objects.create(username="rolled back")
+                raise ValueError
+
+        self.assertFalse(self.user_publish.objects.exists())
+        self.assertFalse(Published.objects.exists())
+
+    def test_should_keep_last_save_that_survived_a_savepoint_rollback(self):
+        with transaction.atomic(), coalesce():
+            user = self.user_publish.objects.create(username="kept")
+            with self.assertRaises(ValueError), transaction.atomic():
+                user.username = "rolled back"
+                user.save()
+                raise ValueError
+
+        self.assertEqual([message.body["username"] for message in Published.objects.all()], ["kept"])
+
+
+class OnlyChangedTestCase(TestCase):
+    def setUp(self):
+        self.user_publish = publish(
+            [Config(destination="destination", fields=["username", "email"], only_changed=True)]
+        )(User)
+        self.user = self.user_publish.objects.create(username="test")
+
+    def test_should_skip_save_without_changes_in_fields(self):
+        user = self.user_publish.objects.get()
+        user.last_login = timezone.now()
+        user.save()
+        user.save()
+        self.assertEqual(Published.objects.count(), 1)
+
+    def test_should_publish_when_a_field_changes(self):
+        user = self.user_publish.objects.get()
+        user.email = "new@test.com"
+        user.save()
+        user.save()
+        self.assertEqual(Published.objects.count(), 2)
+
+        self.user.username = "changed"
+        self.user.save()
+        self.assertEqual(Published.objects.count(), 3)
+
+    def test_should_skip_when_update_fields_do_not_intersect(self):
+        user = self.user_publish.objects.get()
+        user.email = "new@test.com"
+        user.save(update_fields=["last_login"])
+        self.assertEqual(Published.objects.count(), 1)
+
+        user.save(update_fields=["email"])
+        self.assertEqual(Published.objects.count(), 2)
+
+    def test_should_publish_when_deferred_field_is_loaded_and_changed(self):
+        user = self.user_publish.objects.only("id").get()
+        user.save()
+        self.assertEqual(Published.objects.count(), 1)
+
+        user.email = "new@test.com"
+        user.save()
+        self.assertEqual(Published.objects.count(), 2)
@@ -0,0 +1,141 @@
+from io import StringIO
+from unittest.mock import call
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test import TransactionTestCase
+
+from django_outbox_pattern.factories import factory_dead_letter_consumer
+from django_outbox_pattern.models import Received
+
+REPROCESS_COMMAND_PATH = "django_outbox_pattern.management.commands.reprocess_dlq"
+
+
+def _headers(message_id, **extra):
+    return {
+        "message-id": message_id,
+        "subscription": "1",
+        "destination": "/amq/queue/DLQ.queue",
+        "x-death": "count=1",
+        "x-first-death-queue": "queue",
+        "dop-msg-id": message_id,
+        "dop-retry-count": "3",
+        **extra,
+    }
+
+
+class DeadLetterConsumerTest(TransactionTestCase):
+    def setUp(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            self.consumer = factory_dead_letter_consumer(workers=2, prefetch=50)
+        self.connection = self.consumer.connection
+        self.connection.begin.side_effect = ["tx-1", "tx-2"]
+
+    def test_should_subscribe_to_dlq_with_individual_ack_and_prefetch(self):
+        self.consumer.start_dead_letter("queue")
+        self.connection.subscribe.assert_called_once()
+        args, kwargs = self.connection.subscribe.call_args
+        self.assertEqual(args[0], "/amq/queue/DLQ.queue")
+        self.assertEqual(kwargs["ack"], "client-individual")
+        self.assertEqual(kwargs["headers"], {"prefetch-count": 50})
+
+    def test_should_republish_in_transactions_of_batch_size(self):
+        self.consumer.start_dead_letter("queue")
+        self.consumer.batch_size = 2
+        for message_id in ("1", "2", "3"):
+            self.consumer.message_handler('{"message": "dlq"}', _headers(message_id))
+
+        self.assertEqual(self.connection.commit.call_args_list, [call("tx-1")])
+        self.consumer.flush()
+        self.assertEqual(self.connection.commit.call_args_list, [call("tx-1"), call("tx-2")])
+
+        self.assertEqual(self.consumer.stats["republished"], 3)
+        self.connection.send.assert_any_call(
+            destination="/amq/queue/queue",
+            body='{"message": "dlq"}',
+            headers={"dop-msg-id": "1"},
+            transaction="tx-1",
+        )
+        self.connection.ack.assert_any_call("3", transaction="tx-2")
+
+    def test_should_republish_to_target(self):
+        self.consumer.start_dead_letter("queue", target="/topic/destination.v2")
+        self.consumer.message_handler("{}", _headers("1"))
+        self.assertEqual(self.connection.send.call_args.kwargs["destination"], "/topic/destination.v2")
+
+    def test_should_move_messages_not_matching_header_filters_to_the_tail_of_the_dlq(self):
+        self.consumer.start_dead_letter("queue")
+        self.consumer.header_filters = {"dop-correlation-id": "abc"}
+        self.consumer.message_handler("{}", _headers("1"))
+        self.consumer.message_handler("{}", _headers("2", **{"dop-correlation-id": "abc"}))
+        self.consumer.flush()
+
+        self.assertEqual(self.consumer.stats["skipped"], 1)
+        self.assertEqual(self.consumer.stats["republished"], 1)
+        self.assertEqual(
+            self.connection.ack.call_args_list, [call("1", transaction="tx-1"), call("2", transaction="tx-1")]
+        )
+        moved = self.connection.send.call_args_list[0].kwargs
+        self.assertEqual(moved["destination"], "/amq/queue/DLQ.queue")
+        self.assertEqual(moved["headers"]["dop-dlq-skipped"], self.consumer.run_id)
+        self.assertEqual(moved["headers"]["x-death"], "count=1")
+        self.assertNotIn("message-id", moved["headers"])
+
+    def test_should_leave_messages_already_moved_by_the_run(self):
+        self.consumer.start_dead_letter("queue")
+        self.consumer.header_filters = {"dop-correlation-id": "abc"}
+        self.consumer.message_handler("{}", _headers("1", **{"dop-dlq-skipped": self.consumer.run_id}))
+        self.consumer.flush()
+
+        self.assertEqual(self.consumer.stats["skipped"], 0)
+        self.connection.send.assert_not_called()
+        self.connection.ack.assert_not_called()
+
+    def test_dry_run_should_not_send_or_ack(self):
+        self.consumer.start_dead_letter("queue")
+        self.consumer.dry_run = True
+        self.consumer.message_handler("{}", _headers("1"))
+
+        self.assertEqual(self.consumer.stats["matched"], 1)
+        self.connection.send.assert_not_called()
+        self.connection.ack.assert_not_called()
+
+    def test_should_run_callback_and_save_message(self):
+        self.consumer.start_dead_letter("queue", callback=lambda payload: payload.save())
+        self.consumer.message_handler('{"message": "dlq"}', _headers("1"))
+
+        self.assertEqual(Received.objects.get().msg_id, "1")
+        self.connection.ack.assert_called_once_with("1")
+        self.connection.send.assert_not_called()
+
+    def test_should_leave_message_in_dlq_when_callback_fails(self):
+        def callback(payload):
+            raise ValueError("still broken")
+
+        self.consumer.start_dead_letter("queue", callback=callback)
+        with self.assertLogs("django_outbox_pattern", level="WARNING"):
+            self.consumer.message_handler("{}", _headers("1"))
+
+        self.assertEqual(self.consumer.stats["failed"], 1)
+        self.connection.ack.assert_not_called()
+        self.connection.nack.assert_not_called()
+        self.connection.send.assert_not_called()
+
+
+class ReprocessDlqCommandTest(TestCase):
+    def test_should_stop_when_dlq_is_idle_and_report_progress(self):
+        out = StringIO()
+        with patch("django_outbox_pattern.factories.factory_connection"), patch(f"{REPROCESS_COMMAND_PATH}.sleep"):
+            call_command("reprocess_dlq", "queue", "--idle-timeout", "0", "--header", "key=value", stdout=out)
+
+        self.assertIn("0 republished", out.getvalue())
+
+    def test_should_reject_invalid_header_filter(self):
+        with self.assertRaises(CommandError):
+            call_command("reprocess_dlq", "queue", "--header", "key")
+
+    def test_should_reject_unknown_callback(self):
+        with self.assertRaises(CommandError):
+            call_command("reprocess_dlq", "queue", "--callback", "unknown.callback")
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.models import Published
+
+REQUEUE_COMMAND_PATH = "django_outbox_pattern.management.commands.requeue_outbox"
+
+
+class RequeueOutboxCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+
+    def _create(self, status=StatusChoice.FAILED, destination="destination", retry=50, **kwargs):
+        published = Published.objects.create(destination=destination, body={}, status=status, retry=retry)
+        if kwargs:
+            Published.objects.filter(pk=published.pk).update(**kwargs)
+        return published
+
+    def _call(self, *args):
+        call_command("requeue_outbox", *args, stdout=self.out)
+        return self.out.getvalue()
+
+    def _statuses(self):
+        return dict(Published.objects.values_list("pk", "status"))
+
+    def test_should_requeue_only_failed_messages(self):
+        failed = self._create()
+        succeeded = self._create(status=StatusChoice.SUCCEEDED)
+
+        self.assertIn("1 message(s) requeued", self._call())
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, StatusChoice.SCHEDULE)
+        self.assertEqual(failed.retry, 0)
+        self.assertGreater(failed.expires_at, timezone.now())
+        self.assertEqual(self._statuses()[succeeded.pk], StatusChoice.SUCCEEDED)
+
+    def test_should_requeue_in_batches(self):
+        for _ in range(5):
+            self._create()
+
+        with self.assertLogs("django_outbox_pattern", level="INFO") as log:
+            self._call("--batch-size", "2")
+
+        self.assertEqual(len(log.output), 3)
+        self.assertFalse(Published.objects.filter(status=StatusChoice.FAILED).exists())
+
+    def test_should_filter_by_destination_time_window_and_retry(self):
+        now = timezone.now()
+        matching = self._create(added=now - timedelta(hours=2), retry=10)
+        self._create(destination="other", added=now - timedelta(hours=2), retry=10)
+        self._create(added=now - timedelta(days=2), retry=10)
+        self._create(added=now - timedelta(hours=2), retry=50)
+
+        self._call(
+            "--destination",
+            "destination",
+            "--since",
+            (now - timedelta(days=1)).isoformat(),
+            "--until",
+            now.isoformat(),
+            "--max-retry",
+            "20",
+        )
+
+        self.assertEqual(list(Published.objects.filter(status=StatusChoice.SCHEDULE)), [matching])
+
+    def test_should_requeue_expired_scheduled_messages_only_when_asked(self):
+        expired = self._create(status=StatusChoice.SCHEDULE, expires_at=timezone.now() - timedelta(hours=1))
+
+        self._call()
+        expired.refresh_from_db()
+        self.assertLess(expired.expires_at, timezone.now())
+
+        self._call("--include-expired")
+        expired.refresh_from_db()
+        self.assertGreater(expired.expires_at, timezone.now())
+
+    def test_should_refuse_to_requeue_expired_messages_published_by_cdc(self):
+        with patch(f"{REQUEUE_COMMAND_PATH}.replication_slot_exists", return_value=True):
+            with self.assertRaisesRegex(CommandError, "publish_cdc"):
+                self._call("--include-expired")
+            self._call()
+
+    def test_dry_run_should_not_change_messages(self):
+        failed = self._create()
+        self.assertIn("1 message(s) would be requeued", self._call("--dry-run"))
+        self.assertEqual(self._statuses()[failed.pk], StatusChoice.FAILED)
+
+    def test_should_wait_to_respect_rate_limit(self):
+        for _ in range(4):
+            self._create()
+
+        with (
+            patch(f"{REQUEUE_COMMAND_PATH}.monotonic", return_value=0),
+            patch(f"{REQUEUE_COMMAND_PATH}.sleep") as sleep,
+        ):
+            self._call("--batch-size", "2", "--rate", "2")
+
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1.0, 2.0])
+
+    def test_should_reject_invalid_datetime(self):
+        with self.assertRaises(CommandError):
+            self._call("--since", "yesterday")
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from django_outbox_pattern.choices import StatusChoice
+from django_outbox_pattern.decorators import Config
+from django_outbox_pattern.decorators import publish
+from django_outbox_pattern.factories import factory_consumer
+from django_outbox_pattern.factories import factory_producer
+from django_outbox_pattern.models import Published
+from django_outbox_pattern.models import Received
+from django_outbox_pattern.routers import OutboxRouter
+
+User = get_user_model()
+
+
+@patch("django_outbox_pattern.settings.DEFAULT_OUTBOX_DATABASE", "outbox")
+class OutboxRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = OutboxRouter()
+
+    def test_should_route_outbox_models(self):
+        self.assertEqual(self.router.db_for_read(Published), "outbox")
+        self.assertEqual(self.router.db_for_write(Received), "outbox")
+
+    def test_should_not_route_other_models(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertIsNone(self.router.db_for_write(User))
+
+    def test_should_migrate_outbox_models_only_on_outbox_database(self):
+        self.assertTrue(self.router.allow_migrate("outbox", "django_outbox_pattern"))
+        self.assertFalse(self.router.allow_migrate("default", "django_outbox_pattern"))
+        self.assertIsNone(self.router.allow_migrate("default", "auth"))
+
+
+@patch("django_outbox_pattern.settings.DEFAULT_OUTBOX_DATABASE", "outbox")
+class OutboxDatabaseTest(TestCase):
+    databases = {"default", "outbox"}
+
+    def test_managers_should_use_outbox_database(self):
+        self.assertEqual(Published.objects.all().db, "outbox")
+        self.assertEqual(Received.objects.filter(msg_id="1").db, "outbox")
+        self.assertEqual(Published.objects.using("default").db, "default")
+
+    def test_decorator_should_write_published_on_outbox_database(self):
+        user_publish = publish([Config(destination="destination")])(User)
+        user_publish.objects.create(username="test")
+
+        self.assertEqual(Published.objects.count(), 1)
+        self.assertEqual(Published.objects.using("default").count(), 0)
+
+    def test_decorator_should_roll_back_both_databases(self):
+        user_publish = publish([Config(destination="destination")])(User)
+        with self.assertRaises(ValueError):
+            with transaction.atomic(), transaction.atomic(using="outbox"):
+                user_publish.objects.create(username="test")
+                raise ValueError()
+
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Published.objects.exists())
+
+    def test_consumer_should_save_and_deduplicate_on_outbox_database(self):
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            consumer = factory_consumer()
+        consumer.callback = lambda payload: payload.save()
+        consumer.message_handler('{"message": "outbox"}', {"message-id": "1"})
+        consumer.message_handler('{"message": "outbox"}', {"message-id": "1"})
+
+        self.assertEqual(Received.objects.count(), 1)
+        self.assertEqual(Received.objects.using("default").count(), 0)
+
+    def test_producer_should_publish_from_outbox_database(self):
+        published = Published.objects.create(destination="destination", body={"message": "outbox"})
+        with patch("django_outbox_pattern.factories.factory_connection"):
+            producer = factory_producer()
+        with patch.object(producer, "_waiting"):
+            producer.publish_message_from_database()
+
+        published.refresh_from_db()
+        self.assertEqual(published.status, StatusChoice.SUCCEEDED)
@@ -1,4 +1,7 @@
+import json
+import os
 import signal
+import tempfile
 
 from io import StringIO
 from unittest.mock import patch
@@ -7,7 +10,10 @@ from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
 
+from django_outbox_pattern.consumers import Subscription
 from django_outbox_pattern.management.commands.subscribe import Command
+from tests.integration.callback import callback
+from tests.integration.callback import callback_exception
 
 SUBSCRIBE_COMMAND_PATH = "django_outbox_pattern.management.commands.subscribe"
 
@@ -47,6 +53,58 @@ class SubscribeCommandTest(TestCase):
                     call_command("subscribe", "callback", "destination")
                 mock_consumer.stop.assert_called_once()
 
+    def test_command_uses_inbox_consumer_with_inbox_option(self):
+        with (
+            patch(f"{SUBSCRIBE_COMMAND_PATH}.factory_consumer") as mock_factory,
+            patch(f"{SUBSCRIBE_COMMAND_PATH}.factory_inbox_consumer") as mock_inbox_factory,
+        ):
+            mock_inbox_factory.return_value.is_connected.return_value = False
+            with self.assertLogs("django_outbox_pattern", level="INFO"):
+                call_command("subscribe", "tests.integration.callback.callback", "destination", "--inbox")
+
+        mock_factory.assert_not_called()
+        mock_inbox_factory.return_value.start_subscriptions.assert_called_once()
+
+    def test_command_subscribes_destinations_from_settings(self):
+        config = {
+            "/topic/orders.v1": "tests.integration.callback.callback",
+            "/topic/users.v1": {"callback": "tests.integration.callback.callback_exception", "queue_name": "users"},
+        }
+        with patch(f"{SUBSCRIBE_COMMAND_PATH}.factory_consumer") as mock_factory:
+            mock_consumer = mock_factory.return_value
+            mock_consumer.is_connected.return_value = False
+            with patch("django_outbox_pattern.settings.DEFAULT_CONSUMER_SUBSCRIPTIONS", config):
+                with self.assertLogs("django_outbox_pattern", level="INFO"):
+                    call_command("subscribe")
+
+        mock_factory.assert_called_once()
+        (subscriptions,), _ = mock_consumer.start_subscriptions.call_args
+        self.assertEqual(
+            subscriptions,
+            [
+                Subscription(callback, "/topic/orders.v1", None),
+                Subscription(callback_exception, "/topic/users.v1", "users"),
+            ],
+        )
+
+    def test_command_subscribes_destinations_from_config_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config_file:
+            json.dump({"/topic/orders.v1": "tests.integration.callback.callback"}, config_file)
+        self.addCleanup(os.remove, config_file.name)
+
+        with patch(f"{SUBSCRIBE_COMMAND_PATH}.factory_consumer") as mock_factory:
+            mock_consumer = mock_factory.return_value
+            mock_consumer.is_connected.return_value = False
+            with self.assertLogs("django_outbox_pattern", level="INFO"):
+                call_command("subscribe", config=config_file.name)
+
+        (subscriptions,), _ = mock_consumer.start_subscriptions.call_args
+        self.assertEqual(subscriptions, [Subscription(callback, "/topic/orders.v1", None)])
+
+    def test_command_without_arguments_and_subscriptions(self):
+        with self.assertRaisesMessage(CommandError, "DEFAULT_CONSUMER_SUBSCRIPTIONS"):
+            call_command("subscribe")
+
     def test_sigterm_handler_sets_running_false_and_stop_event(self):
         handlers = {}
 
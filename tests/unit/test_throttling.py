@@ -0,0 +1,91 @@
+from django.test import SimpleTestCase
+
+from django_outbox_pattern.throttling import CircuitBreaker
+from django_outbox_pattern.throttling import DestinationThrottle
+from django_outbox_pattern.throttling import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_should_allow_burst_then_refill_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, clock=clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [True, True, False])
+
+        clock.now = 0.5
+        self.assertEqual([bucket.try_acquire() for _ in range(2)], [True, False])
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_should_open_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_should_let_a_single_probe_through_when_half_open(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+
+class DestinationThrottleTest(SimpleTestCase):
+    def test_should_limit_and_break_each_destination_apart(self):
+        throttle = DestinationThrottle(rate_limits={"limited": 1}, threshold=1, reset_timeout=10, clock=FakeClock())
+        self.assertTrue(throttle.allow("limited"))
+        self.assertFalse(throttle.allow("limited"))
+
+        self.assertTrue(throttle.record_failure("broken"))
+        self.assertFalse(throttle.allow("broken"))
+        self.assertTrue(throttle.allow("healthy"))
+        self.assertTrue(throttle.allow("healthy"))
+
+    def test_should_send_a_new_probe_when_the_rate_limit_denied_the_previous_one(self):
+        clock = FakeClock()
+        throttle = DestinationThrottle(rate_limits={"destination": 1}, threshold=1, reset_timeout=0.5, clock=clock)
+        self.assertTrue(throttle.allow("destination"))
+        throttle.record_failure("destination")
+
+        # The circuit is half-open but the bucket is still empty, the probe is not sent
+        clock.now = 0.5
+        self.assertFalse(throttle.allow("destination"))
+        clock.now = 0.8
+        self.assertFalse(throttle.allow("destination"))
+
+        clock.now = 1
+        self.assertTrue(throttle.allow("destination"))
+        throttle.record_success("destination")
+        clock.now = 2
+        self.assertTrue(throttle.allow("destination"))
+
+    def test_should_not_break_when_threshold_is_zero(self):
+        throttle = DestinationThrottle(rate_limits={}, threshold=0, reset_timeout=10)
+        self.assertFalse(throttle.record_failure("destination"))
+        self.assertTrue(throttle.allow("destination"))
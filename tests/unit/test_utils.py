@@ -0,0 +1,64 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.utils import timezone
+
+from django_outbox_pattern.models import Published
+from django_outbox_pattern.utils import delete_added_before
+from django_outbox_pattern.utils import uuid7
+
+
+class UUID7Test(SimpleTestCase):
+    def test_should_generate_version_7_rfc_variant(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, "specified in RFC 4122")
+
+    def test_should_embed_unix_time_in_milliseconds(self):
+        with patch("django_outbox_pattern.utils.time.time_ns", return_value=1_700_000_000_123_456_789):
+            value = uuid7()
+        self.assertEqual(value.int >> 80, 1_700_000_000_123)
+
+    def test_should_sort_by_generation_time(self):
+        with patch("django_outbox_pattern.utils.time.time_ns", side_effect=[1_000_000_000, 2_000_000_000]):
+            first, second = uuid7(), uuid7()
+        self.assertLess(first, second)
+        self.assertLess(str(first), str(second))
+
+
+class DeleteAddedBeforeTest(TestCase):
+    def _create_message_added_hours_ago(self, hours):
+        message = Published.objects.create(destination="destination", body={})
+        Published.objects.filter(pk=message.pk).update(added=self.now - timedelta(hours=hours))
+        return message
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_should_delete_only_messages_added_before_cutoff(self):
+        kept = self._create_message_added_hours_ago(1)
+        for hours in (50, 30, 26):
+            self._create_message_added_hours_ago(hours)
+
+        deleted = delete_added_before(Published.objects.all(), self.now - timedelta(hours=25))
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(list(Published.objects.values_list("pk", flat=True)), [kept.pk])
+
+    def test_should_delete_one_window_at_a_time(self):
+        for hours in (50, 26):
+            self._create_message_added_hours_ago(hours)
+
+        # One query for the oldest message and one delete per window of 24 hours, each in its own transaction
+        with self.assertNumQueries(7):
+            delete_added_before(Published.objects.all(), self.now - timedelta(hours=25))
+
+        self.assertFalse(Published.objects.exists())
+
+    def test_should_not_delete_when_there_are_no_old_messages(self):
+        self._create_message_added_hours_ago(1)
+        with self.assertNumQueries(1):
+            self.assertEqual(delete_added_before(Published.objects.all(), self.now - timedelta(hours=25)), 0)
+        self.assertEqual(Published.objects.count(), 1)